@@ -0,0 +1,152 @@
+# api_local.py — API JSON somente leitura (KPIs, série diária, top produtos, pagamentos)
+#
+# Para a planilha da contabilidade e o display da loja, sem abrir o Streamlit:
+#   python api_local.py            -> http://127.0.0.1:8502
+#
+# Endpoints (todos GET, período opcional ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD; padrão = hoje):
+#   /api/versao        versão atual dos dados
+#   /api/kpis          vendas brutas/líquidas, descontos, despesas, lucro, qtd, ticket médio
+#   /api/diario        série diária (Data, Vendas, Despesas, Lucro)
+#   /api/top-produtos  ?limite=10
+#   /api/pagamentos    receita por forma de pagamento
+#
+# As respostas são cacheadas por versão dos dados e levam ETag: quem consulta a
+# cada poucos segundos recebe 304 sem nenhum cálculo enquanto nada mudar.
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import tornado.ioloop
+import tornado.web
+
+import memoria
+import metricas
+from armazenamento import dados_periodo, ler_instantaneo
+
+HOST = os.environ.get("LANA_API_HOST", "127.0.0.1")
+PORTA = int(os.environ.get("LANA_API_PORT", "8502"))
+MAX_RESPOSTAS = 256
+
+_respostas: OrderedDict = OrderedDict()  # (versão, rota, args) -> corpo JSON
+_lock = threading.Lock()
+
+@memoria.ao_liberar
+def _limpar_respostas():
+    with _lock:
+        _respostas.clear()
+
+def _periodo(handler: tornado.web.RequestHandler):
+    hoje = date.today().isoformat()
+    try:
+        inicio = date.fromisoformat(handler.get_argument("inicio", hoje))
+        fim = date.fromisoformat(handler.get_argument("fim", handler.get_argument("inicio", hoje)))
+    except ValueError:
+        raise tornado.web.HTTPError(400, reason="Datas devem estar no formato AAAA-MM-DD.")
+    if fim < inicio:
+        raise tornado.web.HTTPError(400, reason="'fim' anterior a 'inicio'.")
+    return inicio, fim
+
+def _dados_periodo(inst, inicio, fim):
+    return dados_periodo(inicio, fim, inst=inst)
+
+def _registros(df):
+    """DataFrame -> lista de dicts com datas em ISO e nomes de coluna sem espaço."""
+    out = df.rename(columns=lambda c: c.replace(" ", "_").lower())
+    if "data" in out.columns:
+        out = out.assign(data=out["data"].dt.strftime("%Y-%m-%d"))
+    return json.loads(out.to_json(orient="records", force_ascii=False))
+
+# ---------------- Endpoints ----------------
+def _kpis(h, inst):
+    inicio, fim = _periodo(h)
+    return {"inicio": inicio.isoformat(), "fim": fim.isoformat(), **metricas.kpis(*_dados_periodo(inst, inicio, fim))}
+
+def _diario(h, inst):
+    inicio, fim = _periodo(h)
+    vendas_f, despesas_f = _dados_periodo(inst, inicio, fim)
+    return {"inicio": inicio.isoformat(), "fim": fim.isoformat(),
+            "serie": _registros(metricas.serie_diaria(vendas_f, despesas_f, inicio, fim))}
+
+def _top_produtos(h, inst):
+    inicio, fim = _periodo(h)
+    try:
+        limite = max(1, min(100, int(h.get_argument("limite", "10"))))
+    except ValueError:
+        raise tornado.web.HTTPError(400, reason="'limite' deve ser um número.")
+    vendas_f, _ = _dados_periodo(inst, inicio, fim)
+    return {"inicio": inicio.isoformat(), "fim": fim.isoformat(),
+            "produtos": _registros(metricas.top_produtos(vendas_f, limite))}
+
+def _pagamentos(h, inst):
+    inicio, fim = _periodo(h)
+    vendas_f, _ = _dados_periodo(inst, inicio, fim)
+    return {"inicio": inicio.isoformat(), "fim": fim.isoformat(),
+            "pagamentos": _registros(metricas.dist_pagamentos(vendas_f))}
+
+ROTAS = {
+    "kpis": _kpis,
+    "diario": _diario,
+    "top-produtos": _top_produtos,
+    "pagamentos": _pagamentos,
+}
+
+class ApiHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.set_header("Access-Control-Allow-Origin", "*")
+        self.set_header("Cache-Control", "no-cache")  # o cliente sempre revalida via ETag
+
+    def compute_etag(self):
+        return None  # o ETag é definido em get() a partir da versão dos dados
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"erro": self._reason}, ensure_ascii=False))
+
+    def get(self, rota):
+        # a resposta inteira sai de um único instantâneo: a chave do cache e o ETag
+        # são exatamente a versão usada no cálculo
+        return ler_instantaneo(lambda inst: self._responder(rota, inst))
+
+    def _responder(self, rota, inst):
+        versao = inst.versao_str
+        if rota == "versao":
+            self.finish(json.dumps({"versao": versao}))
+            return
+        fn = ROTAS.get(rota)
+        if fn is None:
+            raise tornado.web.HTTPError(404, reason=f"Endpoint desconhecido: {rota}")
+
+        # "hoje" entra na chave: sem datas explícitas, a resposta muda na virada do dia
+        args = tuple(sorted((k, self.get_argument(k)) for k in self.request.arguments))
+        chave = (versao, rota, args, date.today().isoformat())
+        etag = '"' + hashlib.sha1(repr(chave).encode("utf-8")).hexdigest() + '"'
+        self.set_header("ETag", etag)
+        if etag in self.request.headers.get("If-None-Match", ""):
+            self.set_status(304)
+            self.finish()
+            return
+
+        with _lock:
+            corpo = _respostas.get(chave)
+            if corpo is not None:
+                _respostas.move_to_end(chave)
+        if corpo is None:
+            corpo = json.dumps(fn(self, inst), ensure_ascii=False)
+            with _lock:
+                _respostas[chave] = corpo
+                while len(_respostas) > MAX_RESPOSTAS:
+                    _respostas.popitem(last=False)
+        self.finish(corpo)
+
+def criar_app() -> tornado.web.Application:
+    return tornado.web.Application([(r"/api/([a-z\-]+)/?", ApiHandler)])
+
+if __name__ == "__main__":
+    import migracoes
+    migracoes.garantir_schema()
+    criar_app().listen(PORTA, address=HOST)
+    print(f"🔌 API do Lana Modas em http://{HOST}:{PORTA}/api/kpis")
+    tornado.ioloop.IOLoop.current().start()
@@ -0,0 +1,469 @@
+# armazenamento.py — camada de dados do Lana Modas (CSV em DATA_DIR)
+import io
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+import memoria
+
+# ---------------- Caminhos ----------------
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get("LANA_DATA_DIR") or os.path.join(APP_DIR, "data")  # será criada automaticamente
+os.makedirs(DATA_DIR, exist_ok=True)
+
+ARQ_REGISTROS = os.path.join(DATA_DIR, "registros.csv")
+ARQ_DESPESAS  = os.path.join(DATA_DIR, "despesas.csv")
+
+COLUNAS_VENDAS   = ["Data", "Produto", "Pagamento", "Valor", "Desconto(%)", "Valor Final"]
+COLUNAS_DESPESAS = ["Data", "Categoria", "Descricao", "Valor"]
+NUMERICAS_VENDAS   = ("Valor", "Desconto(%)", "Valor Final")
+NUMERICAS_DESPESAS = ("Valor",)
+CATEGORIAS_DESPESA = ["Roupas", "Salário", "Aluguel", "Outros"]
+FORMAS_PAGAMENTO   = ["Pix", "Cartão Débito", "Cartão Crédito", "Dinheiro", "Outro"]
+
+# ---------------- I/O seguro ----------------
+def safe_read_csv(path: str, seps=(",", ";", "\t")) -> pd.DataFrame:
+    """Tenta ler CSV com separadores comuns. Retorna DataFrame vazio se não existir."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    for s in seps:
+        try:
+            return pd.read_csv(path, sep=s, encoding="utf-8")
+        except Exception:
+            continue
+    # fallback
+    try:
+        return pd.read_csv(path, encoding="utf-8")
+    except Exception:
+        return pd.DataFrame()
+
+def _substituir_arquivo(tmp_path: str, path: str, max_retries: int = 5, delay: float = 0.4):
+    """os.replace com retry (Excel/OneDrive seguram o arquivo por alguns instantes)."""
+    last_err = None
+    for _ in range(max_retries):
+        try:
+            os.replace(tmp_path, path)  # atômico
+            return
+        except PermissionError as e:
+            last_err = e
+            time.sleep(delay)
+    try:
+        os.remove(tmp_path)
+    except Exception:
+        pass
+    raise last_err if last_err else RuntimeError("Falha ao gravar CSV.")
+
+def safe_write_csv(df: pd.DataFrame, path: str, max_retries: int = 5, delay: float = 0.4):
+    """Escrita atômica com retry (lida com arquivo aberto no Excel/OneDrive)."""
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix="tmp_", suffix=".csv", dir=os.path.dirname(path))
+    os.close(tmp_fd)
+    df.to_csv(tmp_path, index=False, encoding="utf-8")
+    _substituir_arquivo(tmp_path, path, max_retries, delay)
+    _publicar()
+
+def carregar_csv_garantindo_colunas(caminho, colunas):
+    """Carrega CSV e garante que todas as colunas existam (em ordem)."""
+    df = safe_read_csv(caminho)
+    if df.empty:
+        df = pd.DataFrame(columns=colunas)
+    for c in colunas:
+        if c not in df.columns:
+            df[c] = None
+    df = df[colunas]
+    return df
+
+def _cabecalho_csv(path: str) -> list[str]:
+    """Lê só a primeira linha do CSV (nomes das colunas)."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        primeira = f.readline().strip("\r\n")
+    return [c.strip() for c in primeira.split(",")] if primeira else []
+
+# gravações do processo (append, exclusão) em fila: uma exclusão regrava o arquivo
+# e não pode perder um append feito no meio dela
+_lock_escrita = threading.RLock()
+
+def append_csv(linhas: pd.DataFrame, path: str, colunas, max_retries: int = 5, delay: float = 0.4):
+    """Acrescenta linhas ao fim do CSV sem regravar o arquivo inteiro.
+
+    Se o arquivo não existe (ou tem layout diferente de `colunas`), cai na
+    regravação completa via safe_write_csv para não desalinhar as colunas.
+    """
+    with _lock_escrita:
+        _append_csv(linhas.reindex(columns=colunas), path, colunas, max_retries, delay)
+        _publicar()
+
+def _publicar():
+    """Publica a versão nova para os leitores logo depois de gravar (ver repositorio.py)."""
+    import repositorio
+    repositorio.publicar()
+
+def _append_csv(linhas, path, colunas, max_retries, delay):
+    if not os.path.exists(path) or os.path.getsize(path) == 0 or _cabecalho_csv(path) != list(colunas):
+        df = carregar_csv_garantindo_colunas(path, colunas)
+        df = linhas if df.empty else pd.concat([df, linhas], ignore_index=True)
+        safe_write_csv(df, path)
+        return
+
+    # garante que a última linha existente termina em quebra de linha
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        falta_nl = f.read(1) not in (b"\n", b"\r")
+
+    last_err = None
+    for _ in range(max_retries):
+        try:
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                if falta_nl:
+                    f.write(os.linesep)
+                linhas.to_csv(f, index=False, header=False)
+            return
+        except PermissionError as e:
+            last_err = e
+            time.sleep(delay)
+    raise last_err if last_err else RuntimeError("Falha ao gravar CSV.")
+
+# ---------------- Leitura tipada ----------------
+def ler_tabela(fonte, colunas, numericas=(), com_cabecalho: bool = True) -> pd.DataFrame:
+    """Leitura direta no layout atual (garantido por migracoes.garantir_schema).
+
+    `fonte` é um caminho ou um buffer de bytes; com com_cabecalho=False (trecho
+    do fim do arquivo) as colunas vêm de `colunas`. Sem adivinhar separador nem
+    completar colunas: Data vira datetime (ISO), `numericas` viram float e o resto texto.
+    """
+    if isinstance(fonte, str) and (not os.path.exists(fonte) or os.path.getsize(fonte) == 0):
+        df = pd.DataFrame(columns=colunas)
+    else:
+        tipos = {c: ("float64" if c in numericas else "string") for c in colunas if c != "Data"}
+        if com_cabecalho:
+            df = pd.read_csv(fonte, encoding="utf-8", usecols=list(colunas), dtype=tipos)
+        else:
+            df = pd.read_csv(fonte, encoding="utf-8", header=None, names=list(colunas), dtype=tipos)
+    df["Data"] = pd.to_datetime(df["Data"], errors="coerce", format="%Y-%m-%d")
+    for c in numericas:
+        df[c] = df[c].astype("float64")
+    return df
+
+# ---------------- Leitura em blocos (modo de pouca memória) ----------------
+BLOCO_LINHAS = 50_000
+
+def _tipo_texto() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        return "string[pyarrow]"  # texto sem um objeto Python por célula
+    except ImportError:
+        return "string"
+
+_TIPOS_COMPACTOS = {"Pagamento": "category", "Categoria": "category", "Desconto(%)": "float32"}
+
+class VersaoMudou(Exception):
+    """O arquivo fixado por um instantâneo foi substituído antes da leitura."""
+
+class _Trecho(io.RawIOBase):
+    """Só os primeiros `tamanho` bytes de um arquivo aberto (o que a versão publicou)."""
+
+    def __init__(self, f, tamanho: int):
+        self._f, self._resta = f, tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        n = min(len(buf), self._resta)
+        if n <= 0:
+            return 0
+        lido = self._f.readinto(memoryview(buf)[:n])
+        self._resta -= lido
+        return lido
+
+def _juntar_blocos(partes: list, colunas, numericas=()) -> pd.DataFrame:
+    if not partes:
+        vazio = pd.DataFrame(columns=colunas)
+        tipos = {c: "float64" for c in numericas if c in colunas}
+        if "Data" in colunas:
+            tipos["Data"] = "datetime64[ns]"
+        return vazio.astype(tipos)
+    if len(partes) > 1:
+        # blocos diferentes enxergam categorias diferentes; unifica antes do concat
+        for c in colunas:
+            if isinstance(partes[0][c].dtype, pd.CategoricalDtype):
+                cats = pd.Index(sorted(set().union(*(p[c].cat.categories for p in partes))))
+                partes = [p.assign(**{c: p[c].cat.set_categories(cats)}) for p in partes]
+    return pd.concat(partes)
+
+def ler_periodo(path: str, colunas, numericas=(), data_inicio=None, data_fim=None,
+                usar=None, posicoes=None, trecho=None, desde=None) -> pd.DataFrame:
+    """Lê o CSV em blocos guardando só as colunas `usar` e as linhas do período.
+
+    Tipos compactos (category, float32, texto pyarrow quando houver) e o índice
+    continua sendo a posição da linha no arquivo. O filtro compara a data ainda
+    como texto ISO, então só as linhas do período são convertidas. A cada bloco o
+    orçamento de memória é conferido (memoria.LimiteMemoria se estourar).
+    `posicoes` restringe às linhas com esses índices. `trecho` = (inode, bytes)
+    de um Instantaneo: lê só até ali e sobe VersaoMudou se o arquivo foi trocado.
+    `desde` = (bytes, linhas) de uma marca anterior: lê só o que veio depois dela
+    (o índice continua a partir de `linhas`).
+    """
+    usar = [c for c in colunas if c in (usar or colunas) or c == "Data"]
+    numericas = [c for c in numericas if c in usar]
+    if trecho is None:
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return ler_tabela(path, usar, numericas)
+        with open(path, "rb") as f:
+            return _ler_blocos(f, path, usar, numericas, data_inicio, data_fim, posicoes)
+    ino, tamanho = trecho
+    ini, primeira = desde or (0, None)
+    if ino is None or tamanho <= ini:
+        return _juntar_blocos([], usar, numericas)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise VersaoMudou(path) from None
+    with f:
+        if os.fstat(f.fileno()).st_ino != ino:
+            raise VersaoMudou(path)
+        # acréscimos posteriores ficam de fora; o inode aberto não muda mais sob nós
+        f.seek(ini)
+        return _ler_blocos(io.BufferedReader(_Trecho(f, tamanho - ini)), path, usar, numericas,
+                           data_inicio, data_fim, posicoes, colunas if desde else None, primeira)
+
+def _ler_blocos(f, path, usar, numericas, data_inicio, data_fim, posicoes,
+                nomes=None, primeira=None) -> pd.DataFrame:
+    tipos = {c: _TIPOS_COMPACTOS.get(c, "float64" if c in numericas else _tipo_texto())
+             for c in usar if c != "Data"}
+    tipos["Data"] = "string"
+    ini = pd.to_datetime(data_inicio).strftime("%Y-%m-%d") if data_inicio is not None else None
+    fim = pd.to_datetime(data_fim).strftime("%Y-%m-%d") if data_fim is not None else None
+
+    partes = []
+    # no meio do arquivo (nomes): sem cabeçalho, colunas na ordem do layout atual
+    cabecalho = {} if nomes is None else {"header": None, "names": list(nomes)}
+    for bloco in pd.read_csv(f, encoding="utf-8", usecols=usar, dtype=tipos, chunksize=BLOCO_LINHAS,
+                             **cabecalho):
+        if primeira:
+            bloco.index += primeira
+        if posicoes is not None:
+            bloco = bloco[bloco.index.isin(posicoes)]
+        if ini is not None or fim is not None:
+            mask = bloco["Data"].notna()
+            if ini is not None:
+                mask &= bloco["Data"] >= ini
+            if fim is not None:
+                mask &= bloco["Data"] <= fim
+            bloco = bloco[mask.fillna(False)]
+        bloco = bloco.assign(Data=pd.to_datetime(bloco["Data"], errors="coerce", format="%Y-%m-%d"))
+        partes.append(bloco if list(bloco.columns) == usar else bloco[usar])
+        memoria.conferir(f"leitura de {os.path.basename(path)}", levantar=True)
+    return _juntar_blocos(partes, usar, numericas)
+
+# ---------------- Leituras isoladas (instantâneos do repositório) ----------------
+def fixar():
+    """Instantâneo atual de vendas + despesas (repositorio.Instantaneo), sem trava.
+
+    Passe o mesmo `inst` às funções abaixo para que todas as leituras de uma tela
+    ou relatório vejam a mesma versão, mesmo com gravações no meio.
+    """
+    import repositorio
+    return repositorio.obter().fixar()
+
+def ler_instantaneo(ler, inst=None):
+    """Executa `ler(inst)`. Sem instantâneo do chamador, fixa um e repete se o arquivo
+    foi trocado durante a leitura em blocos; com um, o chamador decide (VersaoMudou)."""
+    if inst is not None:
+        return ler(inst)
+    for tentativa in range(3):
+        try:
+            return ler(fixar())
+        except VersaoMudou:
+            if tentativa == 2:
+                raise
+
+def versao_dados() -> str:
+    """Versão atual de vendas + despesas (muda a cada gravação; única por processo)."""
+    return fixar().versao_str
+
+def ha_vendas(inst=None) -> bool:
+    """True se a versão fixada tem ao menos uma venda (pela marca do instantâneo, sem abrir o CSV)."""
+    return (inst or fixar()).marcas["vendas"][1] > 0
+
+def _recorte(df: pd.DataFrame, data_inicio, data_fim, colunas) -> pd.DataFrame:
+    if data_inicio is not None or data_fim is not None:
+        mask = df["Data"].notna()
+        if data_inicio is not None:
+            mask &= df["Data"] >= pd.to_datetime(data_inicio)
+        if data_fim is not None:
+            mask &= df["Data"] <= pd.to_datetime(data_fim)
+        df = df[mask]
+    return df if colunas is None else df[[c for c in df.columns if c in colunas or c == "Data"]]
+
+def vendas_periodo(data_inicio=None, data_fim=None, colunas=None, inst=None) -> pd.DataFrame:
+    """Vendas do período (datas inclusivas), só com `colunas` (+ Data) se informadas.
+
+    O índice é a posição da linha no CSV (serve para excluir_vendas). No modo de
+    pouca memória lê em blocos o trecho do instantâneo; no normal recorta a tabela
+    do instantâneo com uma máscara. Não altere o DataFrame devolvido.
+    """
+    def ler(inst):
+        if memoria.pouca_memoria():
+            return ler_periodo(ARQ_REGISTROS, COLUNAS_VENDAS, NUMERICAS_VENDAS, data_inicio, data_fim,
+                               colunas, trecho=inst.trecho("vendas"))
+        return _recorte(inst.tabela("vendas"), data_inicio, data_fim, colunas)
+    return ler_instantaneo(ler, inst)
+
+def vendas_por_posicao(posicoes, inst=None) -> pd.DataFrame:
+    """Vendas nas posições do CSV informadas (ex.: resultado de busca.IndiceProdutos.posicoes)."""
+    def ler(inst):
+        if memoria.pouca_memoria():
+            return ler_periodo(ARQ_REGISTROS, COLUNAS_VENDAS, NUMERICAS_VENDAS, posicoes=posicoes,
+                               trecho=inst.trecho("vendas"))
+        df = inst.tabela("vendas")
+        pos = pd.Index(posicoes, dtype="int64")
+        return df.iloc[pos[pos < len(df)]]
+    return ler_instantaneo(ler, inst)
+
+def despesas_periodo(data_inicio=None, data_fim=None, colunas=None, inst=None) -> pd.DataFrame:
+    """Despesas com data válida no período; mesmas regras de vendas_periodo."""
+    def ler(inst):
+        if memoria.pouca_memoria():
+            df = ler_periodo(ARQ_DESPESAS, COLUNAS_DESPESAS, NUMERICAS_DESPESAS, data_inicio, data_fim,
+                             colunas, trecho=inst.trecho("despesas"))
+            return df.dropna(subset=["Data"])
+        return _recorte(inst.tabela("despesas", so_datas_validas=True), data_inicio, data_fim, colunas)
+    return ler_instantaneo(ler, inst)
+
+def dados_periodo(data_inicio=None, data_fim=None, colunas_vendas=None, colunas_despesas=None,
+                  inst=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(vendas, despesas) do período, as duas da mesma versão."""
+    return ler_instantaneo(lambda inst: (vendas_periodo(data_inicio, data_fim, colunas_vendas, inst),
+                              despesas_periodo(data_inicio, data_fim, colunas_despesas, inst)), inst)
+
+def consultar_despesas(data_inicio=None, data_fim=None, categorias=None, texto: str = "",
+                       ordenar_por: str = "Data", crescente: bool = False,
+                       pagina: int = 1, por_pagina: int = 50) -> tuple[pd.DataFrame, int]:
+    """Uma página de despesas com filtros e ordenação aplicados aqui.
+
+    Retorna (linhas_da_pagina, total_filtrado). Só a página é copiada;
+    o filtro trabalha com máscaras sobre o cache tipado.
+    """
+    df = despesas_periodo(data_inicio, data_fim)
+    mask = pd.Series(True, index=df.index)
+    if categorias:
+        mask &= df["Categoria"].isin(list(categorias))
+    texto = (texto or "").strip()
+    if texto:
+        mask &= df["Descricao"].str.contains(texto, case=False, regex=False, na=False)
+
+    chave_ordem = df.loc[mask, ordenar_por]
+    total = int(chave_ordem.size)
+    por_pagina = max(1, int(por_pagina))
+    ini = (max(1, int(pagina)) - 1) * por_pagina
+    # ordena só a coluna-chave; mergesort mantém a ordem de inserção nos empates
+    idx = chave_ordem.sort_values(ascending=crescente, kind="mergesort").index[ini:ini + por_pagina]
+    return df.loc[idx].reset_index(drop=True), total
+
+def registrar_despesa(data_d, categoria: str, descricao: str, valor: float):
+    """Grava uma despesa com append (sem regravar o histórico)."""
+    nova = pd.DataFrame([{
+        "Data": pd.to_datetime(data_d).strftime("%Y-%m-%d"),
+        "Categoria": categoria,
+        "Descricao": descricao,
+        "Valor": float(valor),
+    }])
+    append_csv(nova, ARQ_DESPESAS, COLUNAS_DESPESAS)
+
+def preparar_lote_vendas(lote: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
+    """Normaliza um lote de vendas digitado em grade e valida todas as linhas juntas.
+
+    Linhas totalmente vazias são descartadas. Retorna (lote_no_layout_do_csv, erros);
+    `Valor Final` é sempre recalculado a partir de Valor e Desconto(%).
+    """
+    df = lote.reindex(columns=["Data", "Produto", "Pagamento", "Valor", "Desconto(%)"]).copy()
+    df["Produto"] = df["Produto"].fillna("").astype(str).str.strip()
+    df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce")
+    df["Desconto(%)"] = pd.to_numeric(df["Desconto(%)"], errors="coerce").fillna(0.0)
+    vazia = (df["Produto"] == "") & df["Valor"].isna()
+    df = df[~vazia].reset_index(drop=True)
+
+    df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    erros = []
+    for i, r in df.iterrows():
+        n = i + 1
+        if pd.isna(r["Data"]):
+            erros.append(f"Linha {n}: data inválida.")
+        if not r["Produto"]:
+            erros.append(f"Linha {n}: informe o produto.")
+        if r["Pagamento"] not in FORMAS_PAGAMENTO:
+            erros.append(f"Linha {n}: forma de pagamento inválida.")
+        if pd.isna(r["Valor"]) or r["Valor"] < 0:
+            erros.append(f"Linha {n}: valor inválido.")
+        if not 0 <= r["Desconto(%)"] <= 100:
+            erros.append(f"Linha {n}: desconto deve estar entre 0 e 100%.")
+
+    df["Valor Final"] = df["Valor"] - (df["Valor"] * df["Desconto(%)"] / 100)
+    df["Data"] = df["Data"].dt.strftime("%Y-%m-%d")
+    return df[COLUNAS_VENDAS], erros
+
+def registrar_vendas(lote: pd.DataFrame):
+    """Grava um lote de vendas (já validado) num único append."""
+    if lote.empty:
+        return
+    append_csv(lote, ARQ_REGISTROS, COLUNAS_VENDAS)
+
+def _mesma_venda(linha: pd.Series, esperado: dict) -> bool:
+    for c, v in esperado.items():
+        atual = linha.get(c, "")
+        if c in NUMERICAS_VENDAS:
+            try:
+                if abs(float(atual) - float(v)) > 0.005:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif c == "Data":
+            if pd.isna(v):
+                # sem data na tela: no arquivo a célula está vazia ou não é uma data válida
+                if not pd.isna(pd.to_datetime(atual, errors="coerce", format="%Y-%m-%d")):
+                    return False
+            elif atual != pd.to_datetime(v).strftime("%Y-%m-%d"):
+                return False
+        elif atual != ("" if pd.isna(v) else str(v)):
+            return False
+    return True
+
+def excluir_vendas(posicoes, esperadas: dict | None = None):
+    """Remove vendas pela posição da linha no CSV (o índice de vendas_periodo).
+
+    Regrava o arquivo em blocos, sem carregá-lo inteiro, mantendo o texto das
+    outras linhas como está. `esperadas` ({posicao: {coluna: valor}}) confere que a
+    linha ainda é a que o usuário viu; se o arquivo mudou por fora, nada é gravado
+    e sobe ValueError.
+    """
+    posicoes = pd.Index(sorted({int(p) for p in posicoes}))
+    esperadas = esperadas or {}
+    with _lock_escrita:
+        if not os.path.exists(ARQ_REGISTROS):
+            raise ValueError("Arquivo de vendas não encontrado.")
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix="tmp_", suffix=".csv", dir=os.path.dirname(ARQ_REGISTROS))
+        achadas = 0
+        try:
+            with os.fdopen(tmp_fd, "w", encoding="utf-8", newline="") as out:
+                out.write(",".join(_cabecalho_csv(ARQ_REGISTROS)) + "\n")
+                for bloco in pd.read_csv(ARQ_REGISTROS, encoding="utf-8", dtype=str,
+                                         keep_default_na=False, chunksize=BLOCO_LINHAS):
+                    alvo = bloco.index.intersection(posicoes)
+                    for p in alvo:
+                        if p in esperadas and not _mesma_venda(bloco.loc[p], esperadas[p]):
+                            raise ValueError("A venda mudou no arquivo desde que a lista foi aberta. Nada foi excluído.")
+                    achadas += len(alvo)
+                    bloco.drop(index=alvo).to_csv(out, index=False, header=False, lineterminator="\n")
+            if achadas != len(posicoes):
+                raise ValueError("Venda não encontrada no arquivo (lista desatualizada). Nada foi excluído.")
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        _substituir_arquivo(tmp_path, ARQ_REGISTROS)
+        _publicar()
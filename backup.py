@@ -0,0 +1,313 @@
+# backup.py — backups incrementais e deduplicados de DATA_DIR
+#
+# Cada arquivo é cortado em blocos definidos pelo conteúdo (rolling hash "gear"),
+# então inserir/apagar linhas só muda os blocos vizinhos. Os blocos são gravados
+# comprimidos (zlib) e endereçados pelo SHA-256 em BACKUP_DIR/chunks; cada snapshot
+# é só um manifesto JSON listando os blocos de cada arquivo.
+#
+# Uso pela linha de comando:
+#   python backup.py criar [--completo]
+#   python backup.py listar
+#   python backup.py restaurar [ID | --em "2025-08-31 23:59"] [--destino PASTA]
+#   python backup.py limpar --manter 30
+import os
+import sys
+import json
+import zlib
+import hashlib
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from armazenamento import APP_DIR, DATA_DIR
+
+BACKUP_DIR = os.environ.get("LANA_BACKUP_DIR") or os.path.join(APP_DIR, "backups")
+CHUNKS_DIR = os.path.join(BACKUP_DIR, "chunks")
+SNAPSHOTS_DIR = os.path.join(BACKUP_DIR, "snapshots")
+ARQ_VERIFICACAO = os.path.join(BACKUP_DIR, "ultima_verificacao")  # ID da última releitura completa
+
+# tamanhos dos blocos (bytes)
+MIN_CHUNK = 2 * 1024
+AVG_CHUNK = 8 * 1024
+MAX_CHUNK = 64 * 1024
+# corte quando os 13 bits *altos* do hash zeram (~1 a cada AVG_CHUNK, como no FastCDC):
+# os bits baixos do gear só dependem dos últimos bytes e cortam de forma irregular
+_MASK = (AVG_CHUNK - 1) << (64 - (AVG_CHUNK - 1).bit_length())
+
+# de quanto em quanto tempo o backup automático relê tudo (confere edições no meio
+# de arquivos que também cresceram, que o atalho de append não enxerga)
+VERIFICACAO_COMPLETA_H = 24
+
+# pastas de DATA_DIR que não entram no backup (arquivos derivados/temporários)
+IGNORAR_PASTAS = {"relatorios"}  # PDFs pré-gerados: refeitos a partir dos CSVs
+
+def _gear_table():
+    """256 inteiros pseudoaleatórios fixos (derivados de SHA-256, estáveis entre execuções)."""
+    return [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little") for i in range(256)]
+
+_GEAR = _gear_table()
+_U64 = (1 << 64) - 1
+_lock = threading.Lock()
+
+# ---------------- Chunking ----------------
+def cortar_blocos(dados: bytes):
+    """Gera (inicio, fim) dos blocos definidos pelo conteúdo de `dados`."""
+    n = len(dados)
+    ini = 0
+    gear = _GEAR
+    while ini < n:
+        fim_max = min(ini + MAX_CHUNK, n)
+        i = ini + MIN_CHUNK  # não precisa olhar o começo: nenhum bloco é menor que MIN_CHUNK
+        if i >= fim_max:
+            yield ini, fim_max
+            ini = fim_max
+            continue
+        h = 0
+        corte = fim_max
+        while i < fim_max:
+            h = ((h << 1) + gear[dados[i]]) & _U64
+            i += 1
+            if not (h & _MASK):
+                corte = i
+                break
+        yield ini, corte
+        ini = corte
+
+def _caminho_bloco(digest: str) -> str:
+    return os.path.join(CHUNKS_DIR, digest[:2], digest + ".z")
+
+def _gravar_atomico(path: str, conteudo: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="tmp_", dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, path)
+
+def _guardar_blocos(dados: bytes) -> tuple[list, int]:
+    """Corta, deduplica e grava os blocos. Retorna ([[sha, tamanho], ...], bytes_novos)."""
+    blocos, novos = [], 0
+    for ini, fim in cortar_blocos(dados):
+        pedaco = dados[ini:fim]
+        digest = hashlib.sha256(pedaco).hexdigest()
+        destino = _caminho_bloco(digest)
+        if not os.path.exists(destino):
+            _gravar_atomico(destino, zlib.compress(pedaco, 6))
+            novos += len(pedaco)
+        blocos.append([digest, len(pedaco)])
+    return blocos, novos
+
+# ---------------- Snapshots ----------------
+def _ids_snapshots() -> list[str]:
+    """IDs dos snapshots em ordem cronológica (o ID é o próprio timestamp)."""
+    if not os.path.isdir(SNAPSHOTS_DIR):
+        return []
+    return sorted(n[:-5] for n in os.listdir(SNAPSHOTS_DIR) if n.endswith(".json"))
+
+def _ler_manifesto(snapshot_id: str) -> dict:
+    with open(os.path.join(SNAPSHOTS_DIR, snapshot_id + ".json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def listar_snapshots() -> list[dict]:
+    """Manifestos existentes, do mais antigo para o mais recente."""
+    return [_ler_manifesto(i) for i in _ids_snapshots()]
+
+def _arquivos_de_dados(origem: str):
+    for raiz, pastas, arquivos in os.walk(origem):
+        pastas[:] = [p for p in pastas if p not in IGNORAR_PASTAS and not p.startswith(".")]
+        for nome in arquivos:
+            if nome.startswith("tmp_"):
+                continue  # temporários do safe_write_csv
+            caminho = os.path.join(raiz, nome)
+            yield os.path.relpath(caminho, origem).replace(os.sep, "/"), caminho
+
+def _backup_arquivo(caminho: str, anterior: dict | None, completo: bool) -> tuple[dict, int, int]:
+    """Manifesto de um arquivo. Retorna (entrada, bytes_lidos, bytes_novos)."""
+    st_ = os.stat(caminho)
+    entrada = {"tamanho": st_.st_size, "mtime_ns": st_.st_mtime_ns, "ino": st_.st_ino}
+
+    if anterior and not completo:
+        # 1) inalterado: nem abre o arquivo
+        if anterior["tamanho"] == st_.st_size and anterior["mtime_ns"] == st_.st_mtime_ns:
+            entrada["blocos"] = anterior["blocos"]
+            return entrada, 0, 0
+
+        # 2) só cresceu (append) no mesmo arquivo: lê a partir do início do último
+        #    bloco antigo, confere o hash dele (como a `cauda` do repositorio) e
+        #    re-corta só esse trecho. Edições no meio do prefixo ficam para a
+        #    verificação completa (--completo / VERIFICACAO_COMPLETA_H).
+        blocos_ant = anterior["blocos"]
+        if blocos_ant and st_.st_size > anterior["tamanho"] and anterior.get("ino") == st_.st_ino:
+            digest_ult, tam_ult = blocos_ant[-1]
+            with open(caminho, "rb") as f:
+                f.seek(anterior["tamanho"] - tam_ult)
+                cauda = f.read()
+            if hashlib.sha256(cauda[:tam_ult]).hexdigest() == digest_ult:
+                novos_blocos, novos = _guardar_blocos(cauda)
+                entrada["blocos"] = blocos_ant[:-1] + novos_blocos
+                return entrada, len(cauda), novos
+
+    # 3) reescrito: lê tudo (blocos iguais continuam deduplicados)
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    entrada["blocos"], novos = _guardar_blocos(dados)
+    return entrada, len(dados), novos
+
+def _criar_snapshot(origem: str, completo: bool) -> dict:
+    ids = _ids_snapshots()
+    anterior = _ler_manifesto(ids[-1])["arquivos"] if ids else {}
+    arquivos, lidos, novos = {}, 0, 0
+    for rel, caminho in _arquivos_de_dados(origem):
+        try:
+            entrada, l, n = _backup_arquivo(caminho, anterior.get(rel), completo)
+        except FileNotFoundError:
+            continue  # apagado durante o backup
+        arquivos[rel] = entrada
+        lidos += l
+        novos += n
+
+    agora = datetime.now()
+    manifesto = {
+        "id": agora.strftime("%Y%m%dT%H%M%S%f"),
+        "criado_em": agora.isoformat(timespec="seconds"),
+        "arquivos": arquivos,
+        "bytes_lidos": lidos,
+        "bytes_novos": novos,
+        "completo": completo or not ids,  # o primeiro snapshot lê tudo de qualquer jeito
+    }
+    _gravar_atomico(os.path.join(SNAPSHOTS_DIR, manifesto["id"] + ".json"),
+                    json.dumps(manifesto, ensure_ascii=False).encode("utf-8"))
+    if manifesto["completo"]:
+        _gravar_atomico(ARQ_VERIFICACAO, manifesto["id"].encode("ascii"))
+    return manifesto
+
+def criar_snapshot(origem: str = DATA_DIR, completo: bool = False) -> dict:
+    """Cria um snapshot incremental de `origem`.
+
+    Com completo=True todos os arquivos são relidos (ignora os atalhos por
+    mtime/append). Retorna o manifesto gravado, com estatísticas de I/O.
+    """
+    with _lock:
+        return _criar_snapshot(origem, completo)
+
+def _verificacao_vencida() -> bool:
+    """True se a última releitura completa tem mais de VERIFICACAO_COMPLETA_H horas."""
+    try:
+        idade = time.time() - os.path.getmtime(ARQ_VERIFICACAO)
+    except FileNotFoundError:
+        return True
+    return idade >= VERIFICACAO_COMPLETA_H * 3600
+
+def ultimo_backup_em() -> datetime | None:
+    """Quando foi feito o último snapshot (vem do ID; não abre o manifesto)."""
+    ids = _ids_snapshots()
+    return datetime.strptime(ids[-1], "%Y%m%dT%H%M%S%f") if ids else None
+
+def snapshot_se_necessario(intervalo_min: float = 30) -> dict | None:
+    """Cria snapshot se o último tiver mais de `intervalo_min` minutos (barato quando nada mudou).
+
+    Não espera: se outro backup já está rodando, simplesmente retorna None.
+    """
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        ultimo = ultimo_backup_em()
+        if ultimo is not None and (datetime.now() - ultimo).total_seconds() < intervalo_min * 60:
+            return None
+        return _criar_snapshot(DATA_DIR, _verificacao_vencida())
+    finally:
+        _lock.release()
+
+# ---------------- Backup automático ----------------
+_trabalhador = None
+_trabalhador_lock = threading.Lock()
+
+def _laco(intervalo_min: float):
+    while True:
+        try:
+            snapshot_se_necessario(intervalo_min)
+            ultimo = ultimo_backup_em()
+            # dorme até o próximo vencimento (e confere de novo pelo menos a cada 5 min)
+            falta = intervalo_min * 60 - ((datetime.now() - ultimo).total_seconds() if ultimo else 0)
+            espera = min(max(falta, 1), 300)
+        except Exception:
+            espera = 300  # pasta de backup indisponível: tenta de novo mais tarde
+        time.sleep(espera)
+
+def iniciar(intervalo_min: float = 30):
+    """Liga (uma vez por processo) o backup incremental em segundo plano."""
+    global _trabalhador
+    with _trabalhador_lock:
+        if _trabalhador is None:
+            _trabalhador = threading.Thread(target=_laco, args=(intervalo_min,), name="backup", daemon=True)
+            _trabalhador.start()
+
+def escolher_snapshot(snapshot_id: str | None = None, em: datetime | None = None) -> dict:
+    """Snapshot pelo ID, o último até o instante `em`, ou o mais recente."""
+    snaps = listar_snapshots()
+    if snapshot_id:
+        for s in snaps:
+            if s["id"] == snapshot_id:
+                return s
+        raise ValueError(f"Snapshot não encontrado: {snapshot_id}")
+    if em is not None:
+        snaps = [s for s in snaps if datetime.fromisoformat(s["criado_em"]) <= em]
+    if not snaps:
+        raise ValueError("Nenhum snapshot disponível para esse momento.")
+    return snaps[-1]
+
+def restaurar(snapshot_id: str | None = None, em: datetime | None = None, destino: str = DATA_DIR) -> dict:
+    """Restaura os arquivos de um snapshot em `destino` (cada arquivo trocado de forma atômica)."""
+    manifesto = escolher_snapshot(snapshot_id, em)
+    for rel, entrada in manifesto["arquivos"].items():
+        partes = []
+        for digest, tam in entrada["blocos"]:
+            with open(_caminho_bloco(digest), "rb") as f:
+                pedaco = zlib.decompress(f.read())
+            if len(pedaco) != tam or hashlib.sha256(pedaco).hexdigest() != digest:
+                raise ValueError(f"Bloco corrompido no backup: {digest}")
+            partes.append(pedaco)
+        _gravar_atomico(os.path.join(destino, *rel.split("/")), b"".join(partes))
+    return manifesto
+
+def limpar(manter: int = 30) -> int:
+    """Mantém só os `manter` snapshots mais recentes e apaga blocos órfãos. Retorna blocos removidos."""
+    with _lock:
+        ids = _ids_snapshots()
+        for i in ids[:-manter] if manter > 0 else ids:
+            os.remove(os.path.join(SNAPSHOTS_DIR, i + ".json"))
+        vivos = {d for s in listar_snapshots() for e in s["arquivos"].values() for d, _ in e["blocos"]}
+        removidos = 0
+        if os.path.isdir(CHUNKS_DIR):
+            for raiz, _, arquivos in os.walk(CHUNKS_DIR):
+                for nome in arquivos:
+                    if nome.endswith(".z") and nome[:-2] not in vivos:
+                        os.remove(os.path.join(raiz, nome))
+                        removidos += 1
+        return removidos
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    cmd = args[0] if args else "criar"
+
+    def _opcao(nome, padrao=None):
+        return args[args.index(nome) + 1] if nome in args else padrao
+
+    if cmd == "criar":
+        m = criar_snapshot(completo="--completo" in args)
+        print(f"✅ Snapshot {m['id']}: {len(m['arquivos'])} arquivos, "
+              f"{m['bytes_lidos']} bytes lidos, {m['bytes_novos']} bytes novos.")
+    elif cmd == "listar":
+        for s in listar_snapshots():
+            total = sum(e["tamanho"] for e in s["arquivos"].values())
+            print(f"{s['id']}  {s['criado_em']}  {len(s['arquivos'])} arquivos  {total} bytes")
+    elif cmd == "restaurar":
+        sid = args[1] if len(args) > 1 and not args[1].startswith("--") else None
+        em = _opcao("--em")
+        m = restaurar(sid, datetime.fromisoformat(em) if em else None, _opcao("--destino", DATA_DIR))
+        print(f"✅ Restaurado snapshot {m['id']} ({m['criado_em']}).")
+    elif cmd == "limpar":
+        n = limpar(int(_opcao("--manter", 30)))
+        print(f"🧹 {n} blocos órfãos removidos.")
+    else:
+        print("Comandos: criar [--completo] | listar | restaurar [ID | --em DATA] [--destino PASTA] | limpar [--manter N]")
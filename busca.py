@@ -0,0 +1,215 @@
+# busca.py — índice de produtos: busca no histórico e autocompletar no cadastro
+#
+# Produto é texto livre, então a mesma peça aparece como "Vestido Floral",
+# "vestido  floral" e "Vestído floral". O índice agrupa as grafias pela chave
+# normalizada (sem acento, minúsculo, só as palavras) e guarda em DATA_DIR/.indice
+# (derivado, fora do backup):
+#   - produtos.json: chave -> grafias usadas (com contagem) e palavra -> produtos;
+#   - linhas.npy: o produto de cada linha de registros.csv (a posição é o índice
+#     de armazenamento.vendas_periodo), para achar as vendas sem ler a tabela.
+# Acompanha as vendas pelos instantâneos do repositorio.py: append → só as linhas
+# novas (Instantaneo.novas_linhas); tabela relida → refaz só com a coluna Produto.
+import bisect
+import json
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+import memoria
+from armazenamento import (
+    DATA_DIR, _substituir_arquivo, ler_instantaneo, vendas_periodo, vendas_por_posicao,
+)
+from texto import normalizar
+
+PASTA_INDICE = os.path.join(DATA_DIR, ".indice", "produtos")
+VERSAO_INDICE = 2
+_PALAVRA = re.compile(r"\w+")
+
+def chave(produto) -> str:
+    """Forma normalizada do nome: "  Vestído  FLORAL!" -> "vestido floral"."""
+    if produto is None or produto is pd.NA or (isinstance(produto, float) and np.isnan(produto)):
+        return ""
+    return " ".join(_PALAVRA.findall(normalizar(produto)))
+
+class IndiceProdutos:
+    """Vocabulário de palavras (com busca por prefixo) -> produtos -> linhas do CSV."""
+
+    def __init__(self, pasta: str = PASTA_INDICE):
+        self.pasta = pasta
+        self.arq_meta = os.path.join(pasta, "produtos.json")
+        self.arq_linhas = os.path.join(pasta, "linhas.npy")
+        self._lock = threading.Lock()
+        self._zerar()
+        self._abrir()
+
+    def _zerar(self):
+        self.chaves = []                          # id -> chave
+        self.ids = {}                             # chave -> id
+        self.grafias = []                         # id -> {grafia: vendas}
+        self.vocab = {}                           # palavra -> [ids]
+        self.palavras = []                        # vocabulário ordenado (prefixos)
+        self.linhas = np.empty(0, dtype=np.int32)  # posição no CSV -> id (-1: sem produto)
+        self.arquivo = None   # identidade de registros.csv já indexada (Instantaneo.arquivos)
+        self.marca = None     # marca do instantâneo já indexado (só neste processo)
+
+    # ---------------- Persistência ----------------
+    def _abrir(self):
+        try:
+            with open(self.arq_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            linhas = np.load(self.arq_linhas)
+        except (OSError, ValueError):
+            return  # sem índice (ou corrompido): o primeiro atualizar() refaz
+        if meta.get("versao") != VERSAO_INDICE or len(linhas) != meta.get("linhas"):
+            return
+        self.chaves, self.grafias = meta["chaves"], meta["grafias"]
+        self.ids = {k: i for i, k in enumerate(self.chaves)}
+        self.vocab = meta["vocab"]
+        self.palavras = sorted(self.vocab)
+        self.linhas = linhas.astype(np.int32, copy=False)
+        self.arquivo = meta["arquivo"]
+
+    def _gravar(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".npy", dir=self.pasta)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, self.linhas)
+        _substituir_arquivo(tmp, self.arq_linhas)
+        meta = {"versao": VERSAO_INDICE, "linhas": int(len(self.linhas)), "arquivo": self.arquivo,
+                "chaves": self.chaves, "grafias": self.grafias, "vocab": self.vocab}
+        fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=self.pasta)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        _substituir_arquivo(tmp, self.arq_meta)
+
+    # ---------------- Ingestão ----------------
+    def _ingerir(self, produtos: pd.Series):
+        """Acrescenta as linhas (na ordem do CSV) ao índice."""
+        codigos, unicos = pd.factorize(produtos.fillna("").astype(str))
+        if not len(codigos):
+            return
+        vendas = np.bincount(codigos, minlength=len(unicos))
+        ids_unicos = np.empty(len(unicos), dtype=np.int32)
+        novas_palavras = False
+        for j, grafia in enumerate(unicos):
+            k = chave(grafia)
+            if not k:
+                ids_unicos[j] = -1
+                continue
+            pid = self.ids.get(k)
+            if pid is None:
+                pid = self.ids[k] = len(self.chaves)
+                self.chaves.append(k)
+                self.grafias.append({})
+                for p in set(k.split()):
+                    if p not in self.vocab:
+                        self.vocab[p] = []
+                        novas_palavras = True
+                    self.vocab[p].append(pid)
+            grafia = " ".join(grafia.split())
+            self.grafias[pid][grafia] = self.grafias[pid].get(grafia, 0) + int(vendas[j])
+            ids_unicos[j] = pid
+        self.linhas = np.concatenate([self.linhas, ids_unicos[codigos]])
+        if novas_palavras:
+            self.palavras = sorted(self.vocab)
+
+    def _sincronizar(self, inst) -> bool:
+        marca, arquivo = inst.marcas["vendas"], list(inst.arquivos["vendas"])
+        if marca == self.marca:
+            return False
+        if self.marca is None and arquivo == self.arquivo:
+            self.marca = marca  # índice gravado é desta mesma versão do arquivo (app reaberto)
+            return False
+        novas = inst.novas_linhas("vendas", self.marca) if self.marca is not None else None
+        if novas is None:
+            # tabela relida (exclusão, edição) ou índice de outra versão
+            self._zerar()
+            if memoria.pouca_memoria():  # sem tabela residente: lê só a coluna, em blocos
+                self._ingerir(vendas_periodo(colunas=["Produto"], inst=inst)["Produto"])
+            else:
+                self._ingerir(inst.tabela("vendas")["Produto"])
+        elif not novas.empty:
+            self._ingerir(novas["Produto"])
+        self.marca, mudou = marca, novas is None or not novas.empty
+        if mudou:
+            self.arquivo = arquivo
+            self._gravar()
+        return mudou
+
+    def atualizar(self, inst=None) -> bool:
+        """Sincroniza com o instantâneo `inst` (padrão: o atual). True se o índice mudou."""
+        with self._lock:
+            return ler_instantaneo(self._sincronizar, inst)
+
+    # ---------------- Consultas ----------------
+    def _ids(self, texto: str) -> list:
+        """Produtos com todas as palavras da consulta (cada uma como prefixo)."""
+        achados = None
+        for p in chave(texto).split():
+            ids = set()
+            i = bisect.bisect_left(self.palavras, p)
+            while i < len(self.palavras) and self.palavras[i].startswith(p):
+                ids.update(self.vocab[self.palavras[i]])
+                i += 1
+            achados = ids if achados is None else achados & ids
+            if not achados:
+                return []
+        return list(achados or [])
+
+    def _total(self, pid: int) -> int:
+        return sum(self.grafias[pid].values())
+
+    def nome(self, pid: int) -> str:
+        """Grafia mais usada do produto."""
+        g = self.grafias[pid]
+        return max(g, key=g.get)
+
+    def sugerir(self, texto: str = "", n: int = 10) -> list[str]:
+        """Até `n` produtos que casam com `texto`, dos mais vendidos para os menos."""
+        self.atualizar()
+        with self._lock:
+            ids = self._ids(texto) if chave(texto) else range(len(self.chaves))
+            ids = sorted(ids, key=self._total, reverse=True)[:n]
+            return [self.nome(i) for i in ids]
+
+    def posicoes(self, texto: str, inst=None) -> np.ndarray:
+        """Posições em registros.csv das vendas cujo produto casa com `texto`.
+
+        Com `inst`, as posições valem para esse instantâneo (passe o mesmo a
+        armazenamento.vendas_por_posicao).
+        """
+        self.atualizar(inst)
+        with self._lock:
+            ids = self._ids(texto)
+            if not ids:
+                return np.empty(0, dtype=np.int64)
+            return np.flatnonzero(np.isin(self.linhas, ids))
+
+    def vendas(self, texto: str) -> pd.DataFrame:
+        """Vendas cujo produto casa com `texto` (posições e linhas do mesmo instantâneo)."""
+        return ler_instantaneo(lambda inst: vendas_por_posicao(self.posicoes(texto, inst), inst))
+
+_instancia = None
+_instancia_lock = threading.Lock()
+
+def obter() -> IndiceProdutos:
+    """Índice único do processo."""
+    global _instancia
+    if _instancia is None:
+        with _instancia_lock:
+            if _instancia is None:
+                _instancia = IndiceProdutos()
+    return _instancia
+
+if __name__ == "__main__":
+    import sys
+    indice = obter()
+    indice.atualizar()
+    consulta = " ".join(sys.argv[1:])
+    print(f"{len(indice.chaves)} produtos, {len(indice.palavras)} palavras, {len(indice.linhas)} vendas")
+    if consulta:
+        print(f"{len(indice.posicoes(consulta))} vendas de: {', '.join(indice.sugerir(consulta))}")
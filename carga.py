@@ -0,0 +1,315 @@
+# carga.py — teste de carga: várias sessões simultâneas do controle_vendas.py
+#
+# Roda o app sem navegador (streamlit.testing AppTest) com N sessões em paralelo,
+# cada uma num processo, todas sobre a mesma base sintética numa pasta temporária
+# (LANA_DATA_DIR/LANA_BACKUP_DIR; os dados reais não são tocados):
+#   python carga.py                                  -> todos os cenários, 4 sessões
+#   python carga.py --sessoes 8 --acoes 40 --cenario caixa --linhas 20000
+#   python carga.py --pouca-memoria 1 --limite-rss 400   -> modo de pouca memória (memoria.py)
+#
+# Para cada cenário mostra a latência de cada rerun (p50/p90/p99 por ação), a vazão
+# (reruns/s) e as gravações perdidas: vendas confirmadas que não estão no CSV ao
+# final e exclusões confirmadas cuja venda continua lá (linha errada apagada).
+# Também mostra o pico de memória (RSS) de cada sessão.
+#
+# Obs.: o AppTest sempre reexecuta o script inteiro (ignora st.fragment), então as
+# latências medidas são um teto para o que o usuário sente no navegador.
+import os
+import re
+import sys
+import random
+import multiprocessing
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(APP_DIR, "controle_vendas.py")
+
+CADASTRO = "📋 Cadastro de Vendas"
+RELATORIOS = "📈 Relatórios"
+
+# cenário -> pesos das ações de cada sessão
+CENARIOS = {
+    "caixa":   {"inserir": 6, "excluir": 2, "periodo": 1, "pdf": 0},
+    "gerente": {"inserir": 1, "excluir": 1, "periodo": 6, "pdf": 2},
+    "misto":   {"inserir": 4, "excluir": 2, "periodo": 3, "pdf": 1},
+}
+PERIODOS = ["Hoje", "7 dias", "Ano inteiro", "Janeiro", "Junho", "Intervalo personalizado"]
+RESOLUCOES = ["Automática", "Diária", "Semanal", "Mensal"]
+
+def _opcao(nome, padrao):
+    if nome in sys.argv:
+        i = sys.argv.index(nome)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return padrao
+
+# ---------------- Base sintética ----------------
+def gerar_base(linhas: int, dias: int = 365, semente: int = 0):
+    """Grava vendas/despesas sintéticas em DATA_DIR. Cada venda da base tem nome único ("Base 000123")."""
+    import pandas as pd
+    import migracoes
+    from armazenamento import (ARQ_REGISTROS, ARQ_DESPESAS, CATEGORIAS_DESPESA, FORMAS_PAGAMENTO,
+                               COLUNAS_VENDAS, safe_write_csv)
+
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp(date.today())
+    datas = (hoje - pd.to_timedelta(rng.integers(0, dias, linhas), unit="D")).strftime("%Y-%m-%d")
+    valor = rng.uniform(10, 400, linhas).round(2)
+    desconto = rng.choice([0.0, 0.0, 0.0, 5.0, 10.0], linhas)
+    vendas = pd.DataFrame({
+        "Data": datas,
+        "Produto": [f"Base {i:06d}" for i in range(linhas)],
+        "Pagamento": rng.choice(FORMAS_PAGAMENTO, linhas),
+        "Valor": valor,
+        "Desconto(%)": desconto,
+        "Valor Final": (valor - valor * desconto / 100).round(2),
+    })[COLUNAS_VENDAS].sort_values("Data", kind="mergesort")
+    n_desp = max(1, linhas // 10)
+    despesas = pd.DataFrame({
+        "Data": (hoje - pd.to_timedelta(rng.integers(0, dias, n_desp), unit="D")).strftime("%Y-%m-%d"),
+        "Categoria": rng.choice(CATEGORIAS_DESPESA, n_desp),
+        "Descricao": "Despesa sintética",
+        "Valor": rng.uniform(20, 800, n_desp).round(2),
+    }).sort_values("Data", kind="mergesort")
+    safe_write_csv(vendas, ARQ_REGISTROS)
+    safe_write_csv(despesas, ARQ_DESPESAS)
+    migracoes.garantir_schema()
+
+# ---------------- Sessão ----------------
+def _widget(lista, rotulo):
+    for w in lista:
+        if w.label == rotulo:
+            return w
+    raise LookupError(f"widget não encontrado: {rotulo}")
+
+_RE_PRODUTO = re.compile(r"<div style='flex:1'>(.*?)</div>")
+
+def _menu_por_sessao():
+    # o menu lateral é um componente (sem valor no AppTest): a página vem do session_state
+    import streamlit as st
+    import streamlit_option_menu
+    streamlit_option_menu.option_menu = lambda *a, **k: st.session_state.get("carga_pagina", k["options"][0])
+
+def _caixa_aceita_nomes_novos():
+    # o navegador envia o texto digitado quando a caixa aceita nomes novos
+    # (accept_new_options); o AppTest só sabe enviar valores que estão entre as opções
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    from streamlit.testing.v1.element_tree import Selectbox
+    original = Selectbox._widget_state
+
+    def _estado(self):
+        v = self.value
+        if v is not None and self.format_func(v) not in self.options:
+            return WidgetState(id=self.id, string_value=str(v))
+        return original.fget(self)
+    Selectbox._widget_state = property(_estado)
+
+class Resultado:
+    def __init__(self):
+        self.latencias = defaultdict(list)  # ação -> [segundos]
+        self.falhas = defaultdict(int)
+        self.erros = defaultdict(int)       # mensagem -> ocorrências
+        self.inseridas = set()
+        self.excluidas = set()
+        self.picos_rss = []                 # MB, um por sessão
+
+    def registrar(self, acao, segundos, erros):
+        self.latencias[acao].append(segundos)
+        if erros:
+            self.falhas[acao] += 1
+            for e in erros:
+                self.erros[str(e).splitlines()[0][:160]] += 1
+
+    def juntar(self, outro: "Resultado"):
+        for acao, lat in outro.latencias.items():
+            self.latencias[acao] += lat
+        for acao, n in outro.falhas.items():
+            self.falhas[acao] += n
+        for msg, n in outro.erros.items():
+            self.erros[msg] += n
+        self.inseridas |= outro.inseridas
+        self.excluidas |= outro.excluidas
+        self.picos_rss += outro.picos_rss
+
+class Sessao:
+    """Uma aba do navegador: um AppTest próprio executando ações sorteadas."""
+
+    def __init__(self, n: int, pesos: dict, semente: int):
+        from streamlit.testing.v1 import AppTest
+        self.n = n
+        self.resultado = Resultado()
+        self.rng = random.Random(semente)
+        self.acoes = [a for a, p in pesos.items() if p > 0]
+        self.pesos = [pesos[a] for a in self.acoes]
+        self.at = AppTest.from_file(APP, default_timeout=120)
+        self.pagina = None
+        self.seq = 0
+
+    def _rodar(self, acao: str | None) -> bool:
+        t0 = time.perf_counter()
+        try:
+            self.at.run()
+            erros = [e.message for e in self.at.exception] + [e.value for e in self.at.error]
+        except Exception as e:  # timeout do AppTest etc.
+            erros = [f"{type(e).__name__}: {e}"]
+        if acao:
+            self.resultado.registrar(acao, time.perf_counter() - t0, erros)
+        return not erros
+
+    def _ir(self, pagina: str, acao: str | None = "navegar"):
+        if self.pagina != pagina:
+            self.at.session_state["carga_pagina"] = pagina
+            self._rodar(acao)
+            self.pagina = pagina
+
+    def aquecer(self):
+        """Primeira carga de cada página (imports, plotly, kaleido) fora da medição."""
+        self._ir(CADASTRO, None)
+        self._ir(RELATORIOS, None)
+
+    # ---- ações ----
+    def inserir(self):
+        self._ir(CADASTRO)
+        self.seq += 1
+        produto = f"Carga s{self.n:02d}-{self.seq:04d}"
+        _widget(self.at.selectbox, "📦 Produto").set_value(produto)
+        _widget(self.at.number_input, "💰 Valor (R$)").set_value(round(self.rng.uniform(10, 300), 2))
+        _widget(self.at.button, "💾 Salvar Venda").click()
+        if self._rodar("inserir"):
+            self.resultado.inseridas.add(produto)
+
+    def excluir(self):
+        self._ir(CADASTRO)
+        linhas = [m.value for m in self.at.markdown if "align-items:center" in m.value]
+        botoes = [b for b in self.at.button if (b.key or "").startswith("del_venda_")]
+        alvos = []
+        for html, botao in zip(linhas, botoes):
+            m = _RE_PRODUTO.search(html)
+            if m and m.group(1).startswith("Base "):
+                alvos.append((botao, m.group(1)))
+        if not alvos:
+            return
+        botao, produto = self.rng.choice(alvos)
+        botao.click()
+        if self._rodar("excluir") and any("excluída" in s.value for s in self.at.success):
+            self.resultado.excluidas.add(produto)
+
+    def periodo(self):
+        self._ir(RELATORIOS)
+        _widget(self.at.selectbox, "📅 Período de Análise:").set_value(self.rng.choice(PERIODOS))
+        if self.rng.random() < 0.3:
+            self.at.radio(key="rel_resolucao").set_value(self.rng.choice(RESOLUCOES))
+        self._rodar("periodo")
+
+    def pdf(self):
+        self._ir(RELATORIOS)
+        try:
+            _widget(self.at.button, "Gerar Relatório PDF").click()
+        except LookupError:
+            return  # período fechado já pré-gerado: o download aparece sem rerun
+        if self._rodar("pdf") and not self.at.get("download_button"):
+            self.resultado.registrar("pdf_sem_arquivo", 0.0, ["download não apareceu"])
+
+    def executar(self, n_acoes: int, pausa: float):
+        for _ in range(n_acoes):
+            getattr(self, self.rng.choices(self.acoes, self.pesos)[0])()
+            if pausa:
+                time.sleep(self.rng.uniform(0, 2 * pausa))
+
+def _processo_sessao(n, pesos, acoes, pausa, semente, largada, fila):
+    # o AppTest troca estado global do Streamlit a cada run (não é thread-safe):
+    # cada sessão roda no seu próprio processo, todas sobre a mesma pasta de dados
+    _menu_por_sessao()
+    _caixa_aceita_nomes_novos()
+    sessao = Sessao(n, pesos, semente)
+    try:
+        sessao.aquecer()
+    finally:
+        largada.wait()
+    try:
+        sessao.executar(acoes, pausa)
+    finally:
+        import memoria
+        pico = memoria.pico_rss_mb()
+        if pico is not None:
+            sessao.resultado.picos_rss.append(pico)
+        fila.put(sessao.resultado)
+
+# ---------------- Cenário ----------------
+def _ms(v):
+    return f"{v * 1000:8.0f}"
+
+def rodar_cenario(nome: str, sessoes: int, acoes: int, linhas: int, pausa: float, semente: int = 0) -> Resultado:
+    from armazenamento import ARQ_REGISTROS, safe_read_csv
+
+    gerar_base(linhas, semente=semente)
+    ctx = multiprocessing.get_context("spawn")
+    largada = ctx.Barrier(sessoes + 1)
+    fila = ctx.Queue()
+    procs = [ctx.Process(target=_processo_sessao, daemon=True,
+                         args=(i, CENARIOS[nome], acoes, pausa, semente * 1000 + i, largada, fila))
+             for i in range(sessoes)]
+    for p in procs:
+        p.start()
+    largada.wait()  # todas aquecidas: começa a medição
+    t0 = time.perf_counter()
+    resultado = Resultado()
+    for _ in procs:
+        resultado.juntar(fila.get())
+    duracao = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+
+    produtos = set(safe_read_csv(ARQ_REGISTROS).get("Produto", []))
+    perdidas = resultado.inseridas - produtos
+    nao_aplicadas = resultado.excluidas & produtos
+    base_apagadas = linhas - sum(1 for p in produtos if str(p).startswith("Base "))
+    total_reruns = sum(len(v) for v in resultado.latencias.values())
+
+    print(f"\n== cenário {nome}: {sessoes} sessões × {acoes} ações, base de {linhas} vendas ==")
+    print(f"{'ação':<16}{'n':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'máx':>9}  (ms){'falhas':>9}")
+    for acao, lat in sorted(resultado.latencias.items()):
+        a = np.asarray(lat)
+        p50, p90, p99 = np.percentile(a, [50, 90, 99])
+        print(f"{acao:<16}{len(a):>6}{_ms(p50)} {_ms(p90)} {_ms(p99)} {_ms(a.max())}      {resultado.falhas[acao]:>7}")
+    print(f"vazão: {total_reruns} reruns em {duracao:.1f}s → {total_reruns / duracao:.2f} reruns/s")
+    print(f"vendas confirmadas: {len(resultado.inseridas)} | perdidas: {len(perdidas)}")
+    print(f"exclusões confirmadas: {len(resultado.excluidas)} | não aplicadas: {len(nao_aplicadas)}"
+          f" | vendas da base apagadas: {base_apagadas}")
+    if resultado.picos_rss:
+        print(f"memória (pico RSS por sessão): máx {max(resultado.picos_rss):.0f} MB"
+              f" | média {np.mean(resultado.picos_rss):.0f} MB")
+    for msg, qtd in sorted(resultado.erros.items(), key=lambda kv: -kv[1])[:5]:
+        print(f"  ⚠️ {qtd}× {msg}")
+    return resultado
+
+def main():
+    sessoes = int(_opcao("--sessoes", "4"))
+    acoes = int(_opcao("--acoes", "25"))
+    linhas = int(_opcao("--linhas", "5000"))
+    pausa = float(_opcao("--pausa", "0"))
+    cenario = _opcao("--cenario", "todos")
+    os.environ["LANA_POUCA_MEMORIA"] = _opcao("--pouca-memoria", os.environ.get("LANA_POUCA_MEMORIA", "auto"))
+    os.environ["LANA_LIMITE_RSS_MB"] = _opcao("--limite-rss", os.environ.get("LANA_LIMITE_RSS_MB", "0"))
+    nomes = list(CENARIOS) if cenario == "todos" else [cenario]
+    if any(n not in CENARIOS for n in nomes):
+        sys.exit(f"Cenário desconhecido: {cenario} (use {', '.join(CENARIOS)} ou todos)")
+
+    # base sintética numa pasta temporária (herdada pelos processos das sessões)
+    pasta = tempfile.mkdtemp(prefix="lana_carga_")
+    os.environ["LANA_DATA_DIR"] = os.path.join(pasta, "data")
+    os.environ["LANA_BACKUP_DIR"] = os.path.join(pasta, "backups")
+    try:
+        for i, nome in enumerate(nomes):
+            rodar_cenario(nome, sessoes, acoes, linhas, pausa, semente=i)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
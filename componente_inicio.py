@@ -0,0 +1,66 @@
+# componente_inicio.py — página Início como componente estático do Streamlit
+#
+# O HTML/CSS/JS fica em componentes/inicio/ e é "montado" uma vez por processo em
+# componentes/inicio/build/, com o hash do conteúdo no nome do CSS e do JS. O
+# servidor de componentes entrega esses arquivos com Cache-Control público, então o
+# navegador baixa cada versão uma única vez; a cada rerun só trafegam os args.
+import os
+import re
+import hashlib
+
+import streamlit.components.v1 as components
+
+_FONTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "componentes", "inicio")
+_BUILD = os.path.join(_FONTE, "build")
+
+def _minificar_css(css: str) -> str:
+    """Remove comentários e espaços supérfluos (sem mexer em strings/valores)."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def _montar() -> str:
+    """Gera build/index.html + assets com hash (só regrava o que mudou). Retorna a pasta."""
+    os.makedirs(_BUILD, exist_ok=True)
+    with open(os.path.join(_FONTE, "inicio.css"), "r", encoding="utf-8") as f:
+        css = _minificar_css(f.read())
+    with open(os.path.join(_FONTE, "inicio.js"), "r", encoding="utf-8") as f:
+        js = f.read()
+    with open(os.path.join(_FONTE, "inicio.html"), "r", encoding="utf-8") as f:
+        html = f.read()
+
+    assets = {}
+    for nome, conteudo in (("inicio.css", css), ("inicio.js", js)):
+        base, ext = os.path.splitext(nome)
+        assets[nome] = f"{base}.{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:12]}{ext}"
+        destino = os.path.join(_BUILD, assets[nome])
+        if not os.path.exists(destino):
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write(conteudo)
+
+    html = html.replace("{{CSS}}", assets["inicio.css"]).replace("{{JS}}", assets["inicio.js"])
+    index = os.path.join(_BUILD, "index.html")
+    atual = None
+    if os.path.exists(index):
+        with open(index, "r", encoding="utf-8") as f:
+            atual = f.read()
+    if atual != html:
+        with open(index, "w", encoding="utf-8") as f:
+            f.write(html)
+
+    # remove versões antigas dos assets
+    for nome in os.listdir(_BUILD):
+        if nome != "index.html" and nome not in assets.values():
+            try:
+                os.remove(os.path.join(_BUILD, nome))
+            except OSError:
+                pass
+    return _BUILD
+
+_componente = components.declare_component("inicio", path=_montar())
+
+def inicio(saudacao: str, nome: str, bio: str, metricas: dict, ctas: list[dict], key: str = "lm_inicio"):
+    """Renderiza a página Início. `ctas` = [{"rotulo", "href", "primario"}]."""
+    return _componente(saudacao=saudacao, nome=nome, bio=bio, metricas=metricas, ctas=ctas,
+                       key=key, default=None)
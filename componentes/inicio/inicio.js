@@ -0,0 +1,90 @@
+// Página Início — assets estáticos (servidos uma vez e cacheados pelo navegador).
+// Só os dados dinâmicos (saudação, métricas, CTAs) chegam do Python a cada rerun,
+// via o protocolo de componentes do Streamlit (postMessage), sem remontar o iframe.
+
+function enviar(type, data){
+  window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data || {}), "*");
+}
+function ajustarAltura(){
+  enviar("streamlit:setFrameHeight", { height: document.documentElement.scrollHeight });
+}
+
+// animação de contadores com sufixo e decimais
+const ease = (t)=>1 - Math.pow(1 - t, 3);
+const DURATION = 900;
+function animateNum(el){
+  const target = parseFloat(el.getAttribute('data-target')) || 0;
+  const suffix = el.getAttribute('data-suffix') || "";
+  const decimals = parseInt(el.getAttribute('data-decimals')||"0",10);
+  const startVal = 0;
+  const start = performance.now();
+  function step(now){
+    const p = Math.min(1, (now - start)/DURATION);
+    const val = startVal + (target - startVal)*ease(p);
+    el.textContent = val.toFixed(decimals).replace('.', ',') + suffix;
+    if (p < 1) requestAnimationFrame(step);
+  }
+  requestAnimationFrame(step);
+}
+const metrics = document.querySelectorAll('.metric .num');
+const io = new IntersectionObserver((entries)=>{
+  entries.forEach(e=>{
+    if(e.isIntersecting){
+      animateNum(e.target);
+      io.unobserve(e.target);
+    }
+  });
+},{ threshold: .4 });
+
+// acessibilidade: Enter/Espaço dá um "pulse" nos cards
+document.querySelectorAll('.card[tabindex="0"]').forEach(card=>{
+  card.addEventListener('keydown', (ev)=>{
+    if(ev.key === 'Enter' || ev.key === ' '){
+      ev.preventDefault();
+      card.style.transform = 'scale(0.99)';
+      setTimeout(()=>card.style.transform='none', 150);
+    }
+  });
+});
+
+// ---- dados dinâmicos ----
+let animado = false;
+function render(args){
+  document.querySelectorAll('[data-campo]').forEach(el=>{
+    const v = args[el.getAttribute('data-campo')];
+    if (v !== undefined) el.textContent = v;
+  });
+
+  const cta = document.getElementById('cta');
+  cta.replaceChildren();
+  (args.ctas || []).forEach(c=>{
+    const a = document.createElement('a');
+    a.className = c.primario ? 'btn primary' : 'btn';
+    a.href = c.href; a.target = '_blank'; a.rel = 'noopener';
+    a.textContent = c.rotulo;
+    cta.appendChild(a);
+  });
+  if (!cta.children.length){
+    const s = document.createElement('span');
+    s.className = 'muted';
+    s.textContent = 'Adicione seus links para mostrar os botões aqui.';
+    cta.appendChild(s);
+  }
+
+  metrics.forEach(el=>{
+    const alvo = (args.metricas || {})[el.getAttribute('data-metrica')];
+    el.setAttribute('data-target', alvo || 0);
+    if (animado) el.textContent = String(alvo || 0).replace('.', ',') + (el.getAttribute('data-suffix') || "");
+  });
+  if (!animado){  // contadores animam só na primeira renderização
+    animado = true;
+    metrics.forEach(m=>io.observe(m));
+  }
+  ajustarAltura();
+}
+
+window.addEventListener("message", (ev)=>{
+  if (ev.data && ev.data.type === "streamlit:render") render(ev.data.args || {});
+});
+new ResizeObserver(ajustarAltura).observe(document.body);
+enviar("streamlit:componentReady", { apiVersion: 1 });
@@ -1,7 +1,7 @@
 import pandas as pd
 
 # Criar arquivo de vendas
-df_vendas = pd.DataFrame(columns=["Data", "Cliente", "Telefone", "Produto", "Pagamento", "Valor"])
+df_vendas = pd.DataFrame(columns=["Data", "Produto", "Pagamento", "Valor", "Desconto(%)", "Valor Final"])
 df_vendas.to_csv("registros.csv", index=False)
 print("✅ Arquivo registros.csv criado com sucesso.")
 
@@ -0,0 +1,67 @@
+# graficos.py — séries para os gráficos do Relatórios (resolução automática + LTTB)
+import numpy as np
+import pandas as pd
+
+# máximo de pontos por traço de linha enviado ao navegador/PDF
+LIMITE_PONTOS = 400
+
+# resolução -> (regra do resample, formato do eixo x, rótulo)
+RESOLUCOES = {
+    "D":  ("D",  "%d/%m",    "Diária"),
+    "W":  ("W-MON", "%d/%m", "Semanal"),
+    "MS": ("MS", "%m/%Y",    "Mensal"),
+}
+
+def escolher_resolucao(n_dias: int) -> str:
+    """Diária até ~3 meses, semanal até ~1 ano e 1 mês, mensal acima disso."""
+    if n_dias <= 92:
+        return "D"
+    if n_dias <= 400:
+        return "W"
+    return "MS"
+
+def agregar(df_diario: pd.DataFrame, resolucao: str, colunas=("Vendas", "Despesas", "Lucro")) -> pd.DataFrame:
+    """Soma a série diária em baldes da resolução pedida (Data = início do balde)."""
+    if resolucao == "D" or df_diario.empty:
+        return df_diario[["Data", *colunas]].copy()
+    regra = RESOLUCOES[resolucao][0]
+    out = (df_diario.set_index("Data")[list(colunas)]
+           .resample(regra, label="left", closed="left").sum()
+           .reset_index())
+    return out
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: índices de `n_out` pontos que preservam a forma da série.
+
+    `x` deve ser numérico e crescente. Primeiro e último ponto são sempre mantidos.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    # limites dos baldes internos (o primeiro e o último ponto ficam de fora)
+    bordas = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        # média do próximo balde (ou o último ponto, no final)
+        prox_ini, prox_fim = bordas[i + 1], (bordas[i + 2] if i + 2 < len(bordas) else n)
+        mx, my = x[prox_ini:prox_fim].mean(), y[prox_ini:prox_fim].mean()
+        # área do triângulo (a, candidato, média do próximo) — fica o maior
+        area = np.abs((x[a] - mx) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (my - y[a]))
+        a = ini + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+def reduzir_linhas(df: pd.DataFrame, colunas, limite: int = LIMITE_PONTOS) -> pd.DataFrame:
+    """Formato longo (Data, variable, value) para px.line; cada traço passa por LTTB se passar do limite."""
+    x = df["Data"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    partes = []
+    for c in colunas:
+        sel = lttb(x, df[c].to_numpy(dtype=float), limite) if len(df) > limite else np.arange(len(df))
+        partes.append(pd.DataFrame({"Data": df["Data"].to_numpy()[sel], "variable": c,
+                                    "value": df[c].to_numpy(dtype=float)[sel]}))
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,365 @@
+# ingestao.py — importação automática de extratos (maquininha, loja virtual) por pasta
+#
+# Solte o CSV exportado em DATA_DIR/entrada: um trabalhador em segundo plano
+# percebe o arquivo (watchdog + varredura periódica), espera a cópia terminar,
+# escolhe o perfil de colunas em entrada/mapeamento.json, descarta o que já está
+# nas vendas e grava o resto em lotes (append). O arquivo vai para
+# entrada/processados (ou entrada/erros, com o motivo ao lado).
+#
+#   python ingestao.py                 -> processa a pasta de entrada uma vez
+#   python ingestao.py extrato.csv     -> importa arquivos avulsos
+#
+# Duplicidade: cada venda vira um hash de (Data, Pagamento, Valor Final) — o que o
+# extrato conhece. O índice (entrada/.indice) acompanha registros.csv pelos
+# instantâneos do repositorio.py (append → só as linhas novas; arquivo relido ou
+# de outra versão → refaz) e conta quantas vezes cada hash aparece, então
+# reimportar o mesmo extrato não duplica nada e duas vendas iguais no mesmo dia
+# continuam sendo duas.
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from fnmatch import fnmatch
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import (
+    DATA_DIR, COLUNAS_VENDAS, FORMAS_PAGAMENTO, _substituir_arquivo, ler_instantaneo, vendas_periodo,
+    registrar_vendas,
+)
+from migracoes import _datas_iso, _numeros
+from texto import normalizar
+
+PASTA_ENTRADA = os.path.join(DATA_DIR, "entrada")
+PASTA_PROCESSADOS = os.path.join(PASTA_ENTRADA, "processados")
+PASTA_ERROS = os.path.join(PASTA_ENTRADA, "erros")
+PASTA_INDICE = os.path.join(PASTA_ENTRADA, ".indice")  # derivado: fora do backup
+ARQ_MAPEAMENTO = os.path.join(PASTA_ENTRADA, "mapeamento.json")
+EXTENSOES = (".csv", ".txt")
+LOTE = 5000          # vendas por append
+ESTAVEL_S = 2.0      # arquivo sem mudar por esse tempo = cópia terminou
+INTERVALO_S = 30.0   # varredura de segurança (eventos perdidos, arquivos de antes do start)
+
+# Um perfil vale para o arquivo quando TODAS as colunas mapeadas existem no
+# cabeçalho (comparação sem acento/maiúscula). Data e Valor são obrigatórios;
+# Produto/Pagamento/Desconto(%) sem coluna usam os padrões do perfil.
+PERFIS_PADRAO = [
+    {
+        "nome": "lana_modas",
+        "arquivos": "*",
+        "colunas": {"Data": "Data", "Produto": "Produto", "Pagamento": "Pagamento",
+                    "Valor": "Valor", "Desconto(%)": "Desconto(%)"},
+    },
+    {
+        "nome": "maquininha",
+        "arquivos": "*",
+        "colunas": {"Data": "Data da venda", "Valor": "Valor bruto", "Pagamento": "Tipo"},
+        "produto_padrao": "Venda maquininha",
+        "pagamentos": {"credito": "Cartão Crédito", "debito": "Cartão Débito", "pix": "Pix"},
+    },
+    {
+        "nome": "loja_virtual",
+        "arquivos": "*",
+        "colunas": {"Data": "Data do pedido", "Produto": "Produto", "Valor": "Total",
+                    "Pagamento": "Meio de pagamento"},
+        "pagamentos": {"cartao de credito": "Cartão Crédito", "pix": "Pix", "boleto": "Outro"},
+    },
+]
+
+def carregar_perfis() -> list:
+    """Perfis de entrada/mapeamento.json (criado com os padrões na primeira vez)."""
+    os.makedirs(PASTA_ENTRADA, exist_ok=True)
+    if not os.path.exists(ARQ_MAPEAMENTO):
+        fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=PASTA_ENTRADA)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"perfis": PERFIS_PADRAO}, f, ensure_ascii=False, indent=2)
+        _substituir_arquivo(tmp, ARQ_MAPEAMENTO)
+    with open(ARQ_MAPEAMENTO, "r", encoding="utf-8") as f:
+        return json.load(f)["perfis"]
+
+# ---------------- Leitura do extrato ----------------
+def _ler_origem(path: str, sep: str | None = None) -> pd.DataFrame:
+    with open(path, "rb") as f:
+        bruto = f.read()
+    for enc in ("utf-8-sig", "latin-1"):  # exportações brasileiras vêm muito em latin-1
+        try:
+            texto = bruto.decode(enc)
+            break
+        except UnicodeDecodeError:
+            continue
+    cab = texto.split("\n", 1)[0]
+    sep = sep or max((";", ",", "\t"), key=cab.count)
+    return pd.read_csv(StringIO(texto), sep=sep, dtype=str, keep_default_na=False)
+
+def escolher_perfil(nome_arquivo: str, colunas, perfis) -> dict | None:
+    cab = {normalizar(c) for c in colunas}
+    for p in perfis:
+        if not fnmatch(nome_arquivo.lower(), p.get("arquivos", "*").lower()):
+            continue
+        if {"Data", "Valor"} <= set(p["colunas"]) and all(normalizar(c) in cab for c in p["colunas"].values()):
+            return p
+    return None
+
+def _pagamentos(origem: pd.Series, perfil: dict) -> pd.Series:
+    """Texto do extrato -> forma de pagamento do app (mapa do perfil, nome igual, ou padrão)."""
+    mapa = {normalizar(k): v for k, v in perfil.get("pagamentos", {}).items()}
+    formas = {normalizar(f): f for f in FORMAS_PAGAMENTO}
+    padrao = perfil.get("pagamento_padrao", "Outro")
+
+    def _um(valor):
+        v = normalizar(valor)
+        if v in mapa:
+            return mapa[v]
+        if v in formas:
+            return formas[v]
+        for chave, forma in mapa.items():  # "credito a vista 1x" contém "credito"
+            if chave and chave in v:
+                return forma
+        return padrao
+
+    return origem.map({u: _um(u) for u in origem.unique()})
+
+def converter(df: pd.DataFrame, perfil: dict) -> tuple[pd.DataFrame, int]:
+    """Extrato -> vendas no layout do CSV. Retorna (vendas, linhas_invalidas)."""
+    col = {normalizar(c): c for c in df.columns}
+    origem = {campo: df[col[normalizar(nome)]] for campo, nome in perfil["colunas"].items()}
+
+    datas = origem["Data"].astype(str).str.strip()
+    if perfil.get("formato_data"):
+        datas = pd.to_datetime(datas, format=perfil["formato_data"], errors="coerce").dt.strftime("%Y-%m-%d")
+    else:
+        datas = _datas_iso(datas.str.slice(0, 10))  # ignora a hora ("25/08/2025 14:31")
+    valor = _numeros(origem["Valor"])
+    desconto = _numeros(origem["Desconto(%)"]).fillna(0.0) if "Desconto(%)" in origem else pd.Series(0.0, index=df.index)
+    produto = (origem["Produto"].astype(str).str.strip() if "Produto" in origem
+               else pd.Series(perfil.get("produto_padrao", "Venda importada"), index=df.index))
+    pagamento = (_pagamentos(origem["Pagamento"], perfil) if "Pagamento" in origem
+                 else pd.Series(perfil.get("pagamento_padrao", "Outro"), index=df.index))
+
+    vendas = pd.DataFrame({
+        "Data": datas,
+        "Produto": produto.where(produto != "", perfil.get("produto_padrao", "Venda importada")),
+        "Pagamento": pagamento,
+        "Valor": valor,
+        "Desconto(%)": desconto,
+        "Valor Final": (valor - valor * desconto / 100).round(2),
+    })[COLUNAS_VENDAS]
+    validas = vendas["Data"].notna() & vendas["Valor"].notna() & (vendas["Valor"] >= 0) & vendas["Desconto(%)"].between(0, 100)
+    return vendas[validas].reset_index(drop=True), int((~validas).sum())
+
+# ---------------- Índice de duplicidade ----------------
+def chaves(datas: pd.Series, pagamentos: pd.Series, valores_finais: pd.Series) -> np.ndarray:
+    """Hash (uint64) de cada venda por Data (AAAA-MM-DD), Pagamento e Valor Final em centavos."""
+    base = pd.DataFrame({
+        "d": datas.astype("string").fillna(""),
+        "p": pagamentos.astype("string").fillna("").map(normalizar),
+        "v": (pd.to_numeric(valores_finais, errors="coerce").fillna(-1) * 100).round().astype("int64"),
+    })
+    return pd.util.hash_pandas_object(base, index=False).to_numpy(dtype=np.uint64)
+
+def _chaves_vendas(df: pd.DataFrame) -> np.ndarray:
+    datas = df["Data"].dt.strftime("%Y-%m-%d") if pd.api.types.is_datetime64_any_dtype(df["Data"]) else df["Data"]
+    return chaves(datas, df["Pagamento"], df["Valor Final"])
+
+class IndiceVendas:
+    """Hashes de registros.csv na ordem do arquivo, persistidos e atualizados só com o que foi acrescentado."""
+
+    def __init__(self, pasta: str = PASTA_INDICE):
+        self.arq_hashes = os.path.join(pasta, "hashes.npy")
+        self.arq_meta = os.path.join(pasta, "meta.json")
+        self.pasta = pasta
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self._unicos, self._contagens = self.hashes, np.empty(0, dtype=np.int64)
+        self.arquivo = None   # identidade de registros.csv já indexada (Instantaneo.arquivos)
+        self.marca = None     # marca do instantâneo já indexado (só neste processo)
+        try:
+            with open(self.arq_meta, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            hashes = np.load(self.arq_hashes)
+            if len(hashes) == meta["linhas"]:
+                self.hashes, self.arquivo = hashes, meta.get("arquivo")
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            pass
+        self._recontar()
+
+    def _recontar(self):
+        self._unicos, self._contagens = np.unique(self.hashes, return_counts=True)
+
+    def _gravar(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".npy", dir=self.pasta)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, self.hashes)
+        _substituir_arquivo(tmp, self.arq_hashes)
+        fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=self.pasta)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"linhas": int(len(self.hashes)), "arquivo": self.arquivo}, f)
+        _substituir_arquivo(tmp, self.arq_meta)
+
+    def _sincronizar(self, inst) -> bool:
+        marca, arquivo = inst.marcas["vendas"], list(inst.arquivos["vendas"])
+        if marca == self.marca:
+            return False
+        if self.marca is None and arquivo == self.arquivo and len(self.hashes) == marca[1]:
+            self.marca = marca  # índice gravado é desta mesma versão do arquivo (app reaberto)
+            return False
+        novas = inst.novas_linhas("vendas", self.marca) if self.marca is not None else None
+        if novas is None:
+            # tabela relida (exclusão, edição) ou índice de outra versão do arquivo
+            vendas = vendas_periodo(colunas=["Pagamento", "Valor Final"], inst=inst)
+            self.hashes = _chaves_vendas(vendas) if len(vendas) else np.empty(0, dtype=np.uint64)
+        elif not novas.empty:
+            self.hashes = np.concatenate([self.hashes, _chaves_vendas(novas)])
+        self.marca, mudou = marca, novas is None or not novas.empty
+        if mudou:
+            self.arquivo = arquivo
+            self._recontar()
+            self._gravar()
+        return mudou
+
+    def sincronizar(self) -> bool:
+        """Acompanha registros.csv pelo instantâneo atual. True se o índice mudou."""
+        return ler_instantaneo(self._sincronizar)
+
+    def novas(self, vendas: pd.DataFrame) -> np.ndarray:
+        """Máscara das vendas que ainda não estão no arquivo (contagem por hash:
+        a k-ésima ocorrência no extrato só entra se o arquivo tiver menos de k)."""
+        h = _chaves_vendas(vendas)
+        ja = np.zeros(len(h), dtype=np.int64)
+        if len(self._unicos):
+            pos = np.minimum(np.searchsorted(self._unicos, h), len(self._unicos) - 1)
+            achou = self._unicos[pos] == h
+            ja[achou] = self._contagens[pos[achou]]
+        ocorrencia = pd.Series(h).groupby(h).cumcount().to_numpy()
+        return ocorrencia >= ja
+
+# ---------------- Processamento ----------------
+_lock = threading.Lock()
+_indice = None
+historico = deque(maxlen=20)  # últimos resultados (mostrados na sidebar)
+
+def _obter_indice() -> IndiceVendas:
+    global _indice
+    if _indice is None:
+        _indice = IndiceVendas()
+    return _indice
+
+def _mover(path: str, pasta: str) -> str:
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, f"{datetime.now():%Y%m%d_%H%M%S}_{os.path.basename(path)}")
+    shutil.move(path, destino)
+    return destino
+
+def importar_arquivo(path: str, mover: bool = True) -> dict:
+    """Importa um extrato. Retorna o resumo (lidas, importadas, duplicadas, inválidas)."""
+    t0 = time.perf_counter()
+    nome = os.path.basename(path)
+    try:
+        df = _ler_origem(path)
+        perfil = escolher_perfil(nome, df.columns, carregar_perfis())
+        if perfil is None:
+            raise ValueError(f"nenhum perfil de mapeamento.json reconhece as colunas {list(df.columns)}")
+        vendas, invalidas = converter(df, perfil)
+        with _lock:
+            indice = _obter_indice()
+            indice.sincronizar()
+            novas = vendas[indice.novas(vendas)]
+            for i in range(0, len(novas), LOTE):
+                registrar_vendas(novas.iloc[i:i + LOTE])
+                indice.sincronizar()  # cada lote gravado já conta para o próximo arquivo
+        resumo = {"arquivo": nome, "perfil": perfil["nome"], "lidas": len(df), "importadas": len(novas),
+                  "duplicadas": len(vendas) - len(novas), "invalidas": invalidas}
+        if mover and os.path.dirname(os.path.abspath(path)) == os.path.abspath(PASTA_ENTRADA):
+            _mover(path, PASTA_PROCESSADOS)
+    except Exception as e:
+        resumo = {"arquivo": nome, "erro": f"{type(e).__name__}: {e}"}
+        if mover and os.path.dirname(os.path.abspath(path)) == os.path.abspath(PASTA_ENTRADA):
+            destino = _mover(path, PASTA_ERROS)
+            with open(destino + ".erro.txt", "w", encoding="utf-8") as f:
+                f.write(resumo["erro"] + "\n")
+    resumo["segundos"] = round(time.perf_counter() - t0, 3)
+    resumo["quando"] = datetime.now().isoformat(timespec="seconds")
+    historico.appendleft(resumo)
+    return resumo
+
+def pendentes() -> tuple[list, float | None]:
+    """(arquivos prontos na entrada, segundos até o próximo ficar pronto)."""
+    prontos, espera = [], None
+    agora = time.time()
+    for nome in sorted(os.listdir(PASTA_ENTRADA)) if os.path.isdir(PASTA_ENTRADA) else []:
+        path = os.path.join(PASTA_ENTRADA, nome)
+        if nome.startswith((".", "tmp_", "~$")) or not nome.lower().endswith(EXTENSOES) or not os.path.isfile(path):
+            continue
+        idade = agora - os.path.getmtime(path)
+        if idade >= ESTAVEL_S:
+            prontos.append(path)
+        else:
+            espera = min(espera or ESTAVEL_S, ESTAVEL_S - idade)
+    return prontos, espera
+
+def processar_entrada() -> list:
+    """Importa todos os arquivos prontos da pasta de entrada."""
+    prontos, _ = pendentes()
+    return [importar_arquivo(p) for p in prontos]
+
+# ---------------- Trabalhador em segundo plano ----------------
+_acordar = threading.Event()
+_trabalhador = None
+_trabalhador_lock = threading.Lock()
+
+def _laco():
+    while True:
+        try:
+            for p in pendentes()[0]:
+                importar_arquivo(p)
+            espera = pendentes()[1]
+        except Exception:
+            espera = None  # pasta sumiu/sem permissão: tenta de novo na próxima varredura
+        _acordar.wait(timeout=espera if espera is not None else INTERVALO_S)
+        _acordar.clear()
+
+def _observar():
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return  # sem watchdog fica só a varredura periódica
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.event_type in ("created", "moved", "modified", "closed"):
+                _acordar.set()
+
+    obs = Observer()
+    obs.daemon = True
+    obs.schedule(_Handler(), PASTA_ENTRADA, recursive=False)
+    obs.start()
+
+def iniciar():
+    """Liga (uma vez por processo) o trabalhador da pasta de entrada."""
+    global _trabalhador
+    with _trabalhador_lock:
+        if _trabalhador is None:
+            carregar_perfis()  # cria a pasta e o mapeamento.json de exemplo
+            _observar()
+            _trabalhador = threading.Thread(target=_laco, name="ingestao", daemon=True)
+            _trabalhador.start()
+
+if __name__ == "__main__":
+    carregar_perfis()
+    resultados = [importar_arquivo(p, mover=False) for p in sys.argv[1:]] if len(sys.argv) > 1 else processar_entrada()
+    for r in resultados:
+        if "erro" in r:
+            print(f"❌ {r['arquivo']}: {r['erro']}")
+        else:
+            print(f"✅ {r['arquivo']} ({r['perfil']}): {r['importadas']} importadas, "
+                  f"{r['duplicadas']} duplicadas, {r['invalidas']} inválidas em {r['segundos']}s")
+    if not resultados:
+        print(f"Nada para importar em {PASTA_ENTRADA}")
@@ -0,0 +1,195 @@
+# memoria.py — modo de pouca memória + orçamento de RSS do processo
+#
+# Modo normal: vendas/despesas ficam inteiras em memória (repositorio.py), uma
+# cópia por processo. Modo de pouca memória: nada fica residente; cada tela lê o
+# CSV em blocos, só com as colunas e as linhas (datas) que precisa, em tipos
+# compactos (armazenamento.ler_periodo).
+#
+#   LANA_POUCA_MEMORIA=1 | 0 | auto   (padrão auto: liga em máquinas com até ~4 GB de RAM)
+#   LANA_LIMITE_RSS_MB=1500           (0/vazio = sem limite)
+#
+# Passou do limite: o processo entra no modo de pouca memória, descarta os caches
+# e uma leitura em blocos que continuar crescendo para com LimiteMemoria.
+# A medição usa psutil (Requirements.txt) e, sem ele, /proc no Linux ou a API do
+# Windows via ctypes. Sem nenhuma, o limite não tem efeito e a tela avisa.
+import gc
+import os
+import sys
+
+LIMITE_RSS_MB = float(os.environ.get("LANA_LIMITE_RSS_MB") or 0)
+RAM_PEQUENA_MB = 4.5 * 1024  # "computador comum" de 4 GB (o sistema reporta um pouco menos)
+
+class LimiteMemoria(MemoryError):
+    pass
+
+def _psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+# ---------------- Windows sem psutil (ctypes) ----------------
+def _win_processo():
+    """(memória residente, pico) do processo em bytes via GetProcessMemoryInfo."""
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (nome, ctypes.c_size_t) for nome in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    try:
+        kernel32, psapi = ctypes.WinDLL("kernel32"), ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                               wintypes.DWORD]
+        c = PROCESS_MEMORY_COUNTERS()
+        c.cb = ctypes.sizeof(c)
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(c), c.cb):
+            return None
+        return c.WorkingSetSize, c.PeakWorkingSetSize
+    except (OSError, AttributeError):
+        return None
+
+def _win_ram_total():
+    """RAM física em bytes via GlobalMemoryStatusEx."""
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [("dwLength", wintypes.DWORD), ("dwMemoryLoad", wintypes.DWORD)] + [
+            (nome, ctypes.c_ulonglong) for nome in (
+                "ullTotalPhys", "ullAvailPhys", "ullTotalPageFile", "ullAvailPageFile",
+                "ullTotalVirtual", "ullAvailVirtual", "ullAvailExtendedVirtual")]
+
+    try:
+        m = MEMORYSTATUSEX()
+        m.dwLength = ctypes.sizeof(m)
+        if not ctypes.WinDLL("kernel32").GlobalMemoryStatusEx(ctypes.byref(m)):
+            return None
+        return m.ullTotalPhys
+    except (OSError, AttributeError):
+        return None
+
+# ---------------- Medição ----------------
+
+def ram_total_mb() -> float | None:
+    ps = _psutil()
+    if ps is not None:
+        return ps.virtual_memory().total / 2**20
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    except (AttributeError, ValueError, OSError):
+        pass
+    total = _win_ram_total()
+    return total / 2**20 if total else None
+
+def rss_mb() -> float | None:
+    """Memória residente atual do processo."""
+    ps = _psutil()
+    if ps is not None:
+        return ps.Process().memory_info().rss / 2**20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    win = _win_processo()
+    return win[0] / 2**20 if win else None
+
+def pico_rss_mb() -> float | None:
+    """Maior memória residente do processo desde o início."""
+    try:
+        # Linux: VmHWM (ru_maxrss sobrevive ao exec e herdaria o pico do processo pai)
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 1024  # macOS: bytes; Linux: KB
+    except ImportError:
+        pass
+    ps = _psutil()  # Windows
+    if ps is not None:
+        return getattr(ps.Process().memory_info(), "peak_wset", 0) / 2**20 or None
+    win = _win_processo()
+    return win[1] / 2**20 if win else None
+
+def medicao_disponivel() -> bool:
+    """False quando não há como medir a memória do processo (o limite fica sem efeito)."""
+    return rss_mb() is not None
+
+def _modo_inicial() -> bool:
+    v = (os.environ.get("LANA_POUCA_MEMORIA") or "auto").strip().lower()
+    if v in ("1", "sim", "true", "on"):
+        return True
+    if v in ("0", "nao", "não", "false", "off"):
+        return False
+    total = ram_total_mb()
+    return total is not None and total <= RAM_PEQUENA_MB
+
+_pouca_memoria = _modo_inicial()
+_liberadores = []
+_rss_apos_liberar = None  # RSS logo depois da última liberação (None: abaixo do limite desde então)
+_FOLGA_MB = 32            # quanto a memória precisa crescer para valer liberar de novo
+
+def pouca_memoria() -> bool:
+    return _pouca_memoria
+
+def ao_liberar(fn):
+    """Registra uma função que descarta um cache quando o processo entra no modo de pouca memória."""
+    _liberadores.append(fn)
+    return fn
+
+def ativar_pouca_memoria():
+    global _pouca_memoria
+    _pouca_memoria = True
+    for fn in list(_liberadores):
+        try:
+            fn()
+        except Exception:
+            pass
+    gc.collect()
+
+def conferir(onde: str = "", levantar: bool = False):
+    """Aplica o orçamento: acima do limite, troca para o modo de pouca memória.
+
+    Com levantar=True (leituras em blocos) e ainda acima do limite depois de
+    liberar os caches, interrompe com LimiteMemoria. Enquanto continua acima, os
+    caches só são liberados de novo se a memória cresceu desde a última vez (e
+    não a cada bloco lido).
+    """
+    global _rss_apos_liberar
+    if not LIMITE_RSS_MB:
+        return
+    atual = rss_mb()
+    if atual is None or atual <= LIMITE_RSS_MB:
+        _rss_apos_liberar = None
+        return
+    if _rss_apos_liberar is None or atual > _rss_apos_liberar + _FOLGA_MB:
+        ativar_pouca_memoria()
+        atual = _rss_apos_liberar = rss_mb() or 0
+    if levantar and atual > LIMITE_RSS_MB:
+        raise LimiteMemoria(f"Memória acima do limite ({atual:.0f} MB > {LIMITE_RSS_MB:.0f} MB)"
+                            + (f" em {onde}" if onde else "") + ". Escolha um período menor.")
+
+def resumo() -> str:
+    """Linha para a tela: memória atual, pico, limite e modo."""
+    atual, pico = rss_mb(), pico_rss_mb()
+    partes = [f"{atual:.0f} MB" if atual is not None else "indisponível"]
+    if pico is not None:
+        partes.append(f"pico {pico:.0f} MB")
+    if LIMITE_RSS_MB:
+        partes.append(f"limite {LIMITE_RSS_MB:.0f} MB" + (" (sem efeito)" if atual is None else ""))
+    return " • ".join(partes) + (" • modo econômico" if _pouca_memoria else "")
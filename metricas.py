@@ -0,0 +1,59 @@
+# metricas.py — cálculos do Relatórios (usados pela página e pela API local)
+#
+# Entradas no layout de armazenamento.vendas_periodo()/despesas_periodo() (no modo
+# de pouca memória Pagamento/Categoria chegam como category: observed=True evita
+# linhas zeradas para categorias fora do período).
+import pandas as pd
+
+from busca import chave
+
+def filtrar_periodo(df: pd.DataFrame, data_inicio, data_fim) -> pd.DataFrame:
+    """Linhas com Data entre as duas datas (inclusive)."""
+    return df[df["Data"].between(pd.to_datetime(data_inicio), pd.to_datetime(data_fim))]
+
+def serie_diaria(vendas_f: pd.DataFrame, despesas_f: pd.DataFrame, data_inicio, data_fim) -> pd.DataFrame:
+    """Série diária contínua (dias sem movimento = 0): Data, Vendas, Despesas, Lucro."""
+    intervalo = pd.date_range(pd.to_datetime(data_inicio), pd.to_datetime(data_fim), freq="D")
+    v_dia = (vendas_f.set_index("Data").resample("D")["Valor Final"].sum().reindex(intervalo, fill_value=0)) if not vendas_f.empty else pd.Series(0, index=intervalo)
+    d_dia = (despesas_f.set_index("Data").resample("D")["Valor"].sum().reindex(intervalo, fill_value=0)) if not despesas_f.empty else pd.Series(0, index=intervalo)
+    df_diario = pd.DataFrame({"Data": intervalo, "Vendas": v_dia.values.astype(float), "Despesas": d_dia.values.astype(float)})
+    df_diario["Lucro"] = df_diario["Vendas"] - df_diario["Despesas"]
+    return df_diario
+
+def kpis(vendas_f: pd.DataFrame, despesas_f: pd.DataFrame) -> dict:
+    """Vendas brutas/líquidas, descontos, despesas, lucro, quantidade e ticket médio."""
+    total_bruto = float(vendas_f["Valor"].fillna(0).sum())
+    total_liq   = float(vendas_f["Valor Final"].fillna(0).sum())
+    descontos   = float((vendas_f["Valor"].fillna(0) - vendas_f["Valor Final"].fillna(0)).sum())
+    total_desp  = float(despesas_f["Valor"].fillna(0).sum())
+    qtd         = int(len(vendas_f))
+    return {
+        "vendas_brutas": total_bruto,
+        "descontos": descontos,
+        "vendas_liquidas": total_liq,
+        "despesas": total_desp,
+        "lucro": total_liq - total_desp,
+        "qtd_vendas": qtd,
+        "ticket_medio": total_liq / qtd if qtd else 0.0,
+    }
+
+def dist_pagamentos(vendas_f: pd.DataFrame) -> pd.DataFrame:
+    """Receita (Valor Final) por forma de pagamento, da maior para a menor."""
+    return (vendas_f.groupby("Pagamento", dropna=False, observed=True)["Valor Final"].sum()
+            .reset_index().sort_values("Valor Final", ascending=False))
+
+def top_produtos(vendas_f: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """Os `n` produtos com maior receita (Valor Final).
+
+    Grafias diferentes do mesmo produto ("Vestido Floral", "vestído floral") somam
+    juntas, com o nome escrito do jeito mais usado no período.
+    """
+    produto = vendas_f["Produto"].astype("string").fillna("").str.strip()
+    unicos = produto.unique()
+    g = pd.DataFrame({"chave": produto.map(dict(zip(unicos, map(chave, unicos)))),
+                      "Produto": produto, "Valor Final": vendas_f["Valor Final"]})
+    nomes = (g.groupby(["chave", "Produto"]).size().reset_index(name="n")
+             .sort_values("n", ascending=False, kind="mergesort").drop_duplicates("chave")
+             .set_index("chave")["Produto"])
+    receita = g.groupby("chave")["Valor Final"].sum().sort_values(ascending=False).head(n)
+    return pd.DataFrame({"Produto": nomes.reindex(receita.index).to_numpy(), "Valor Final": receita.to_numpy()})
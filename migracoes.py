@@ -0,0 +1,162 @@
+# migracoes.py — versão do schema dos CSVs + migrações ordenadas
+#
+# A versão de cada arquivo fica em DATA_DIR/schema.json. Quando um arquivo está
+# atrás da versão atual, as migrações pendentes rodam UMA vez, em streaming
+# (blocos de linhas), e o original é guardado como <arquivo>.v<N>.bak. Depois
+# disso a leitura do dia a dia (armazenamento.carregar_*) assume o layout atual.
+#
+# Para mudar o schema: acrescente uma função no fim da lista da tabela; nunca
+# altere migrações que já foram publicadas.
+import os
+import json
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+
+from armazenamento import (
+    DATA_DIR, ARQ_REGISTROS, ARQ_DESPESAS, COLUNAS_VENDAS, COLUNAS_DESPESAS,
+    _cabecalho_csv, _substituir_arquivo,
+)
+
+ARQ_SCHEMA = os.path.join(DATA_DIR, "schema.json")
+BLOCO_LINHAS = 50_000
+
+def _datas_iso(s: pd.Series) -> pd.Series:
+    """Datas em AAAA-MM-DD; aceita ISO (com ou sem hora) e dd/mm/aaaa. Inválidas viram vazio."""
+    iso = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    br = pd.to_datetime(s.where(iso.isna()), errors="coerce", format="%d/%m/%Y")
+    return iso.fillna(br).dt.strftime("%Y-%m-%d")
+
+def _numeros(s: pd.Series) -> pd.Series:
+    """Números vindos do Excel pt-BR ("1.234,50", "R$ 50,5") ou já no formato do app ("50.5")."""
+    txt = s.astype("string").str.replace("R$", "", regex=False).str.strip()
+    br = txt.str.contains(",", regex=False, na=False)
+    txt = txt.where(~br, txt.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(txt, errors="coerce")
+
+def _ajustar_layout(df: pd.DataFrame, colunas, aliases: dict) -> pd.DataFrame:
+    df = df.rename(columns=lambda c: aliases.get(str(c).strip(), str(c).strip()))
+    for c in colunas:
+        if c not in df.columns:
+            df[c] = None
+    return df[colunas]
+
+# ---------------- Vendas (registros.csv) ----------------
+def _vendas_v1_layout(df):
+    """Layout único: junta os dois geradores antigos (criar_csv.py / criar_arquivos.py).
+
+    Colunas que não existem mais (Cliente, Telefone) ficam só no .bak.
+    """
+    return _ajustar_layout(df, COLUNAS_VENDAS, {
+        "DescontoPerc": "Desconto(%)", "Desconto": "Desconto(%)",
+        "ValorFinal": "Valor Final", "Forma de Pagamento": "Pagamento",
+    })
+
+def _vendas_v2_tipos(df):
+    """Data ISO, números válidos, Desconto vazio = 0 e Valor Final sempre preenchido."""
+    df = df.copy()
+    df["Data"] = _datas_iso(df["Data"])
+    for c in ["Valor", "Desconto(%)", "Valor Final"]:
+        df[c] = _numeros(df[c])
+    df["Desconto(%)"] = df["Desconto(%)"].fillna(0.0)
+    df["Valor Final"] = df["Valor Final"].fillna(df["Valor"] - df["Valor"] * df["Desconto(%)"] / 100)
+    return df
+
+# ---------------- Despesas (despesas.csv) ----------------
+def _despesas_v1_layout(df):
+    return _ajustar_layout(df, COLUNAS_DESPESAS, {"Descrição": "Descricao", "Descrição ": "Descricao"})
+
+def _despesas_v2_tipos(df):
+    df = df.copy()
+    df["Data"] = _datas_iso(df["Data"])
+    df["Valor"] = _numeros(df["Valor"]).fillna(0.0)
+    return df
+
+TABELAS = {
+    "registros.csv": (ARQ_REGISTROS, COLUNAS_VENDAS, [_vendas_v1_layout, _vendas_v2_tipos]),
+    "despesas.csv":  (ARQ_DESPESAS, COLUNAS_DESPESAS, [_despesas_v1_layout, _despesas_v2_tipos]),
+}
+
+# ---------------- Motor ----------------
+_lock = threading.Lock()
+
+def ler_versoes() -> dict:
+    try:
+        with open(ARQ_SCHEMA, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _gravar_versoes(versoes: dict):
+    fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=DATA_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(versoes, f, ensure_ascii=False, indent=2)
+    _substituir_arquivo(tmp, ARQ_SCHEMA)
+
+def _detectar_sep(path: str) -> str:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        cab = f.readline()
+    return max((",", ";", "\t"), key=cab.count)
+
+def versao_do_arquivo(nome: str, versoes: dict | None = None) -> int:
+    """Versão registrada — ou 0 se o cabeçalho não bate com o layout atual (arquivo antigo/restaurado)."""
+    path, colunas, migracoes = TABELAS[nome]
+    versoes = ler_versoes() if versoes is None else versoes
+    if os.path.exists(path) and os.path.getsize(path) > 0 and _cabecalho_csv(path) != list(colunas):
+        return 0
+    return int(versoes.get(nome, 0))
+
+def migrar_arquivo(nome: str, de: int) -> int:
+    """Aplica as migrações pendentes de `nome` num único passe em streaming. Retorna a nova versão."""
+    path, colunas, migracoes = TABELAS[nome]
+    alvo = len(migracoes)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        pd.DataFrame(columns=colunas).to_csv(path, index=False, encoding="utf-8")
+        return alvo
+
+    pendentes = migracoes[de:]
+    sep = _detectar_sep(path)
+    shutil.copy2(path, f"{path}.v{de}.bak")
+    fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".csv", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as out:
+            cabecalho = True
+            try:
+                blocos = pd.read_csv(path, sep=sep, encoding="utf-8", dtype=str, chunksize=BLOCO_LINHAS)
+                for bloco in blocos:
+                    for m in pendentes:
+                        bloco = m(bloco)
+                    bloco.to_csv(out, index=False, header=cabecalho)
+                    cabecalho = False
+            except pd.errors.EmptyDataError:
+                pass
+            if cabecalho:  # arquivo só com cabeçalho (ou vazio)
+                pd.DataFrame(columns=colunas).to_csv(out, index=False)
+        _substituir_arquivo(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return alvo
+
+def garantir_schema() -> dict:
+    """Leva todas as tabelas à versão atual. Barato quando já está tudo migrado
+    (lê o schema.json e a 1ª linha de cada CSV). Retorna {arquivo: (de, para)} do que migrou."""
+    with _lock:
+        versoes = ler_versoes()
+        feitas = {}
+        for nome, (path, _, migracoes) in TABELAS.items():
+            de = versao_do_arquivo(nome, versoes)
+            if de < len(migracoes) or not os.path.exists(path):
+                versoes[nome] = migrar_arquivo(nome, de)
+                feitas[nome] = (de, versoes[nome])
+        if feitas:
+            _gravar_versoes(versoes)
+        return feitas
+
+if __name__ == "__main__":
+    for nome, (de, para) in garantir_schema().items():
+        print(f"✅ {nome}: v{de} → v{para}")
+    print("Versões:", ler_versoes())
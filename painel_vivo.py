@@ -0,0 +1,189 @@
+# painel_vivo.py — Relatórios "ao vivo": KPIs e gráficos atualizados por delta
+#
+# Com o modo ao vivo ligado, a tela confere o repositório a cada INTERVALO_S
+# segundos (dois os.stat quando nada mudou). Se só chegaram vendas/despesas novas
+# (append), soma apenas essas linhas aos totais, aos dias da série diária, à fatia
+# da forma de pagamento e à barra do produto, e troca os dados dos traços das
+# figuras já montadas — sem reler o período nem recriar as figuras no plotly
+# express. Se o arquivo foi reescrito (exclusão, edição no Excel), recalcula tudo;
+# no modo de pouca memória as linhas novas vêm de uma leitura só do trecho
+# acrescentado. Cada passada fixa um instantâneo do repositório, então vendas e
+# despesas vêm sempre da mesma versão.
+import heapq
+import os
+import time
+
+import pandas as pd
+
+import graficos
+import metricas
+import relatorios
+from armazenamento import VersaoMudou, dados_periodo, fixar, ler_instantaneo
+from busca import chave
+
+INTERVALO_S = float(os.environ.get("LANA_AO_VIVO_S") or 5)
+TOP_N = 10
+
+class PainelVivo:
+    """Agregados de um período + as figuras da tela, mantidos por delta."""
+
+    def __init__(self, data_inicio, data_fim, rotulo_res: str = "Automática"):
+        self.inicio, self.fim = pd.to_datetime(data_inicio), pd.to_datetime(data_fim)
+        self.rotulo_res = rotulo_res
+        self.deltas = 0           # atualizações incrementais aplicadas
+        self.recalculos = 0
+        self.mudou_em = time.time()
+        self._recalcular()
+
+    @property
+    def periodo(self):
+        return self.inicio, self.fim
+
+    # ---------------- Carga completa ----------------
+    def _recalcular(self):
+        def ler(inst):
+            return inst, dados_periodo(self.inicio, self.fim, relatorios.COLUNAS_VENDAS_PDF,
+                                       relatorios.COLUNAS_DESPESAS_PDF, inst=inst)
+        inst, (vendas_f, despesas_f) = ler_instantaneo(ler)
+        self.marcas = inst.marcas
+
+        self.kpi = metricas.kpis(vendas_f, despesas_f)
+        self.diario = metricas.serie_diaria(vendas_f, despesas_f, self.inicio, self.fim).set_index("Data")
+        dist = metricas.dist_pagamentos(vendas_f) if not vendas_f.empty else None
+        self.pagamentos = {} if dist is None else dict(zip(dist["Pagamento"], dist["Valor Final"]))
+        self.receita, self.grafias = {}, {}
+        self._somar_produtos(vendas_f)
+        self.recalculos += 1
+        self._montar_figuras()
+
+    def _somar_produtos(self, vendas: pd.DataFrame):
+        """Receita por produto (chave normalizada) e contagem de cada grafia."""
+        if vendas.empty:
+            return
+        produto = vendas["Produto"].astype("string").fillna("").str.strip()
+        unicos = produto.unique()
+        g = (pd.DataFrame({"k": produto.map(dict(zip(unicos, map(chave, unicos)))), "p": produto,
+                           "v": vendas["Valor Final"].fillna(0)})
+             .groupby(["k", "p"])["v"].agg(["sum", "size"]))
+        for (k, p), soma, n in zip(g.index, g["sum"], g["size"]):
+            self.receita[k] = self.receita.get(k, 0.0) + float(soma)
+            grafias = self.grafias.setdefault(k, {})
+            grafias[p] = grafias.get(p, 0) + int(n)
+
+    def _top(self) -> pd.DataFrame:
+        top = heapq.nlargest(TOP_N, self.receita.items(), key=lambda kv: kv[1])
+        nomes = [max(self.grafias[k], key=self.grafias[k].get) for k, _ in top]
+        return pd.DataFrame({"Produto": nomes, "Valor Final": [v for _, v in top]})
+
+    def _dist(self) -> pd.DataFrame:
+        return pd.DataFrame({"Pagamento": list(self.pagamentos), "Valor Final": list(self.pagamentos.values())})
+
+    # ---------------- Figuras ----------------
+    def _montar_figuras(self):
+        self._montar_tempo()
+        # pizza/top montadas a partir dos agregados (poucas linhas), não das vendas
+        self.fig_pag = relatorios.fig_pagamentos(self._dist()) if self.pagamentos else None
+        self.fig_top = relatorios.fig_top(self._top()) if self.receita else None
+
+    def _montar_tempo(self):
+        df_diario = self.diario.reset_index()
+        self.res_linha, self.res_barra = relatorios.resolucoes(df_diario, self.rotulo_res)
+        self.fig_linha = relatorios.fig_linha(df_diario, self.res_linha)
+        self.fig_barras = relatorios.fig_barras(df_diario, self.res_barra)
+
+    def trocar_resolucao(self, rotulo_res: str):
+        if rotulo_res != self.rotulo_res:
+            self.rotulo_res = rotulo_res
+            self._montar_tempo()
+
+    def figuras(self) -> list:
+        return [f for f in (self.fig_linha, self.fig_barras, self.fig_pag, self.fig_top) if f is not None]
+
+    def _atualizar_tempo(self):
+        """Novos valores nos traços de linha/barras (o eixo x é o mesmo: o período não mudou)."""
+        df_diario = self.diario.reset_index()
+        linha = graficos.agregar(df_diario, self.res_linha)
+        if len(linha) > graficos.LIMITE_PONTOS:
+            # linha reduzida por LTTB: os pontos escolhidos podem mudar
+            self.fig_linha = relatorios.fig_linha(df_diario, self.res_linha)
+        else:
+            janela = {"D": 7, "W": 4, "MS": 3}[self.res_linha]
+            media = linha["Vendas"].rolling(janela, min_periods=1).mean()
+            for tr in self.fig_linha.data:
+                tr.y = (linha[tr.name] if tr.name in linha else media).to_numpy(dtype=float)
+        barras = graficos.agregar(df_diario, self.res_barra)
+        for tr in self.fig_barras.data:
+            tr.y = barras[tr.name].to_numpy(dtype=float)
+
+    def _atualizar_pagamentos(self, afetados):
+        if self.fig_pag is None:
+            self.fig_pag = relatorios.fig_pagamentos(self._dist())
+            return
+        tr = self.fig_pag.data[0]
+        rotulos, valores = list(tr.labels), list(tr.values)
+        for p in afetados:
+            if p in rotulos:
+                valores[rotulos.index(p)] = self.pagamentos[p]
+            else:
+                rotulos.append(p)
+                valores.append(self.pagamentos[p])
+        tr.labels, tr.values = rotulos, valores
+
+    def _atualizar_top(self):
+        top = self._top()
+        if self.fig_top is None:
+            self.fig_top = relatorios.fig_top(top)
+            return
+        tr = self.fig_top.data[0]
+        tr.x, tr.y = top["Produto"].tolist(), top["Valor Final"].to_numpy(dtype=float)
+
+    # ---------------- Delta ----------------
+    def atualizar(self) -> bool:
+        """Aplica o que mudou desde a última conferência. True se algo mudou na tela."""
+        inst = fixar()
+        if inst.marcas == self.marcas:
+            return False
+        try:
+            novas_v = inst.novas_linhas("vendas", self.marcas["vendas"])
+            novas_d = inst.novas_linhas("despesas", self.marcas["despesas"])
+        except VersaoMudou:  # pouca memória: arquivo trocado depois do instantâneo
+            novas_v = novas_d = None
+        if novas_v is None or novas_d is None:
+            self._recalcular()  # fixa de novo: a versão lida é a que fica nas marcas
+            self.mudou_em = time.time()
+            return True
+        self.marcas = inst.marcas
+        novas_v = metricas.filtrar_periodo(novas_v, self.inicio, self.fim)
+        novas_d = metricas.filtrar_periodo(novas_d, self.inicio, self.fim)
+        if novas_v.empty and novas_d.empty:
+            return False
+
+        k = self.kpi
+        bruto, liq = float(novas_v["Valor"].fillna(0).sum()), float(novas_v["Valor Final"].fillna(0).sum())
+        k["vendas_brutas"] += bruto
+        k["vendas_liquidas"] += liq
+        k["descontos"] += bruto - liq
+        k["despesas"] += float(novas_d["Valor"].fillna(0).sum())
+        k["qtd_vendas"] += len(novas_v)
+        k["lucro"] = k["vendas_liquidas"] - k["despesas"]
+        k["ticket_medio"] = k["vendas_liquidas"] / k["qtd_vendas"] if k["qtd_vendas"] else 0.0
+
+        # só os dias que receberam linhas
+        if not novas_v.empty:
+            self.diario["Vendas"] = self.diario["Vendas"].add(novas_v.groupby("Data")["Valor Final"].sum(), fill_value=0)
+        if not novas_d.empty:
+            self.diario["Despesas"] = self.diario["Despesas"].add(novas_d.groupby("Data")["Valor"].sum(), fill_value=0)
+        self.diario["Lucro"] = self.diario["Vendas"] - self.diario["Despesas"]
+        self._atualizar_tempo()
+
+        if not novas_v.empty:
+            por_pag = novas_v.groupby("Pagamento", dropna=False, observed=True)["Valor Final"].sum()
+            for p, v in por_pag.items():
+                self.pagamentos[p] = self.pagamentos.get(p, 0.0) + float(v)
+            self._atualizar_pagamentos(por_pag.index)
+            self._somar_produtos(novas_v)
+            self._atualizar_top()
+
+        self.deltas += 1
+        self.mudou_em = time.time()
+        return True
@@ -0,0 +1,408 @@
+# relatorios.py — figuras e PDF do Relatórios (+ cache de PDFs de períodos fechados)
+#
+# Um período fechado (data_fim < hoje) não muda mais, então o PDF dele é guardado
+# em DATA_DIR/relatorios com uma chave = período + resolução + "versão do período"
+# (hash das vendas/despesas daquele intervalo). Lançamento novo em outro mês não
+# invalida nada; só uma edição tardia dentro do período gera um novo PDF.
+#
+# Os meses fechados são pré-gerados em segundo plano quando o app está ocioso
+# (ver iniciar_pregeracao): o PDF de agosto fica pronto logo depois da virada do
+# mês e o download é imediato.
+import os
+import glob
+import hashlib
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+import pandas as pd
+import plotly.express as px
+
+# ReportLab (PDF)
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import (
+    BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer,
+    LongTable, Table, TableStyle, PageBreak, Image as RLImage
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas as _canvas
+
+import graficos
+import metricas
+from armazenamento import DATA_DIR, _substituir_arquivo, dados_periodo
+
+PASTA_PDFS = os.path.join(DATA_DIR, "relatorios")
+VERSAO_LAYOUT = 3   # incremente ao mudar o PDF: invalida todos os arquivos guardados
+MESES_PREGERADOS = 12
+# colunas que entram no PDF: as telas podem ler só estas (e o hash do período também)
+COLUNAS_VENDAS_PDF = ["Data", "Produto", "Pagamento", "Valor", "Valor Final"]
+COLUNAS_DESPESAS_PDF = ["Data", "Valor"]
+
+# ---------------- Formatação ----------------
+def fmt_brl(v):
+    return f"R$ {float(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def fmt_brl_safe(v):
+    try:
+        return fmt_brl(v)
+    except Exception:
+        v = 0 if pd.isna(v) else float(v)
+        return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def plotly_base(fig, titulo=None, tickformat="%d/%m"):
+    if titulo:
+        fig.update_layout(title=dict(text=titulo, x=0.01, xanchor="left"))
+    fig.update_layout(
+        template="plotly_dark",
+        margin=dict(l=10, r=160, t=50, b=40),
+        hoverlabel=dict(bgcolor="rgba(20,20,20,0.9)", font_size=12),
+        legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.02, traceorder="normal", bgcolor="rgba(0,0,0,0)"),
+        font=dict(size=13),
+    )
+    fig.update_xaxes(showgrid=False, tickformat=tickformat, automargin=True)
+    fig.update_yaxes(title=None, tickprefix="R$ ", separatethousands=True, automargin=True)
+    return fig
+
+# ---------------- Resolução dos gráficos ----------------
+# períodos longos viram baldes semanais/mensais; linhas acima de
+# graficos.LIMITE_PONTOS pontos passam por LTTB (payload sempre limitado)
+ORDEM_RES = ["D", "W", "MS"]
+ROTULOS_RES = {"Automática": None, "Diária": "D", "Semanal": "W", "Mensal": "MS"}
+HOVER_X = {"D": "%{x|%d/%m/%Y}", "W": "Semana de %{x|%d/%m/%Y}", "MS": "%{x|%m/%Y}"}
+
+def resolucoes(df_diario, rotulo: str = "Automática"):
+    """(resolução da linha, resolução das barras) para o rótulo escolhido na tela."""
+    res_auto = graficos.escolher_resolucao(len(df_diario))
+    resolucao = ROTULOS_RES.get(rotulo) or res_auto
+    # barras não passam por LTTB: usam no mínimo a resolução automática
+    return resolucao, max(resolucao, res_auto, key=ORDEM_RES.index)
+
+# ---------------- Figuras (tela e PDF) ----------------
+def fig_linha(df_diario, resolucao):
+    _, fmt_x, nome_res = graficos.RESOLUCOES[resolucao]
+    df_diario_plot = graficos.agregar(df_diario, resolucao)
+    janela_mm, nome_mm = {"D": (7, "Vendas_MA7"), "W": (4, "Vendas_MA4s"), "MS": (3, "Vendas_MA3m")}[resolucao]
+    df_diario_plot[nome_mm] = df_diario_plot["Vendas"].rolling(janela_mm, min_periods=1).mean()
+    df_linha = graficos.reduzir_linhas(df_diario_plot, ["Vendas", "Despesas", "Lucro", nome_mm])
+    fig_line = px.line(df_linha, x="Data", y="value", color="variable",
+                       markers=len(df_diario_plot) <= 62, render_mode="svg")
+    fig_line.for_each_trace(lambda tr: tr.update(line=dict(shape="spline")) if tr.name == nome_mm else None)
+    fig_line.for_each_trace(lambda t: t.update(hovertemplate=HOVER_X[resolucao] + "<br>%{y:.2f}"))
+    return plotly_base(fig_line, f"📅 Evolução {nome_res} (com Média Móvel {janela_mm} {dict(D='dias', W='semanas', MS='meses')[resolucao]})", fmt_x)
+
+def fig_barras(df_diario, res_bar):
+    df_bar = graficos.agregar(df_diario, res_bar)
+    fig_bar = px.bar(df_bar, x="Data", y=["Vendas", "Despesas", "Lucro"], barmode="group")
+    fig_bar.for_each_trace(lambda t: t.update(hovertemplate=HOVER_X[res_bar] + "<br>%{y:.2f}"))
+    return plotly_base(fig_bar, f"📊 Comparativo {graficos.RESOLUCOES[res_bar][2]} (Vendas × Despesas × Lucro)", graficos.RESOLUCOES[res_bar][1])
+
+def fig_pagamentos(vendas_f):
+    dist_pag = metricas.dist_pagamentos(vendas_f) if not vendas_f.empty else None
+    if dist_pag is None or dist_pag.empty:
+        return None
+    fig_pag = px.pie(dist_pag, names="Pagamento", values="Valor Final", hole=0.45)
+    fig_pag.update_traces(textinfo="percent+label", hovertemplate="%{label}<br>%{value:.2f}")
+    return plotly_base(fig_pag, "💳 Distribuição por Forma de Pagamento")
+
+def fig_top(vendas_f):
+    top_prod = metricas.top_produtos(vendas_f, 10) if not vendas_f.empty else None
+    if top_prod is None or top_prod.empty:
+        return None
+    fig_top = px.bar(top_prod, x="Produto", y="Valor Final")
+    fig_top.update_xaxes(tickangle=-20)
+    fig_top.update_traces(hovertemplate="%{x}<br>%{y:.2f}")
+    return plotly_base(fig_top, "🏆 Top 10 Produtos por Receita (Valor Final)")
+
+# ---------------- PDF ----------------
+def _draw_header_footer(c: _canvas.Canvas, doc, data_inicio, data_fim):
+    brand = colors.HexColor("#FF006F")
+    w, h = A4
+    c.saveState()
+    # Header
+    c.setFillColor(brand); c.rect(0, h-18*mm, w, 18*mm, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(12*mm, h-11*mm, "Relatório Financeiro - Lana Modas")
+    c.setFont("Helvetica", 9)
+    c.drawRightString(
+        w-12*mm, h-11*mm,
+        f"Período: {pd.to_datetime(data_inicio).strftime('%d/%m/%Y')} a {pd.to_datetime(data_fim).strftime('%d/%m/%Y')}"
+    )
+    # Footer
+    c.setFillColor(colors.grey)
+    c.setFont("Helvetica", 8)
+    c.drawString(12*mm, 10*mm, "Gerado por Lana Modas")
+    c.drawRightString(w-12*mm, 10*mm, f"Página {doc.page}")
+    c.restoreState()
+
+def _fig_to_story(fig, width_mm=178, ratio=16/9):
+    """(flowable, True) com o gráfico em PNG; (aviso, False) se não deu para rasterizar."""
+    # Requer: pip install -U kaleido
+    try:
+        import plotly.io as pio
+        height_px = int((width_mm / 25.4) * 96 / ratio * 2)  # aproximação para manter proporção
+        png = pio.to_image(fig, format="png", width=1600, height=max(600, height_px), scale=2, engine="kaleido")
+        bio = BytesIO(png)
+        w = min(width_mm*mm, A4[0]-24*mm)
+        h = w / ratio
+        return RLImage(bio, width=w, height=h), True
+    except Exception:
+        return Paragraph(
+            "Obs.: Para incluir gráficos no PDF, instale o pacote <b>kaleido</b> (pip install -U kaleido).",
+            ParagraphStyle("warn", parent=getSampleStyleSheet()["BodyText"], textColor=colors.red, fontSize=9)
+        ), False
+
+def _gerar_pdf(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res) -> tuple[bytes, bool]:
+    """PDF do período (KPIs, tabela diária e gráficos) a partir das linhas já filtradas.
+
+    Retorna (pdf, completo): completo=False se algum gráfico ficou de fora.
+    """
+    kpi_periodo = metricas.kpis(vendas_f, despesas_f)
+    df_diario = metricas.serie_diaria(vendas_f, despesas_f, data_inicio, data_fim)
+
+    buffer = BytesIO()
+    styles = getSampleStyleSheet()
+    h2 = ParagraphStyle(
+        "H2",
+        parent=styles["Heading2"],
+        fontName="Helvetica-Bold",
+        textColor=colors.HexColor("#FF006F"),
+        spaceBefore=8, spaceAfter=6
+    )
+    body = ParagraphStyle("Body", parent=styles["BodyText"], fontSize=9.5, leading=12)
+
+    doc = BaseDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=12*mm, rightMargin=12*mm, topMargin=28*mm, bottomMargin=16*mm,
+        title="Relatório Financeiro - Lana Modas", author="Lana Modas",
+        subject="Vendas, Despesas e Lucro"
+    )
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+    doc.addPageTemplates([PageTemplate(
+        id='p1', frames=frame,
+        onPage=lambda c, d: _draw_header_footer(c, d, data_inicio, data_fim),
+    )])
+
+    story = []
+
+    # KPIs
+    kpi_data = [
+        ["Vendas Brutas",   fmt_brl_safe(kpi_periodo["vendas_brutas"])],
+        ["Descontos",       fmt_brl_safe(kpi_periodo["descontos"])],
+        ["Despesas",        fmt_brl_safe(kpi_periodo["despesas"])],
+        ["Lucro (Líquido)", fmt_brl_safe(kpi_periodo["lucro"])],
+    ]
+    kpi = Table(kpi_data, colWidths=[70*mm, 40*mm], hAlign="LEFT")
+    kpi.setStyle(TableStyle([
+        ("FONT",        (0,0), (-1,-1), "Helvetica", 10),
+        ("ALIGN",       (1,0), (1,-1),  "RIGHT"),
+        ("GRID",        (0,0), (-1,-1), 0.25, colors.Color(0.75,0.75,0.75)),
+        ("BOX",         (0,0), (-1,-1), 0.25, colors.Color(0.75,0.75,0.75)),
+        ("BACKGROUND",  (0,0), (-1,0),  colors.whitesmoke),
+        ("TEXTCOLOR",   (0,3), (-1,3),  colors.HexColor("#0b0b0e")),
+        ("BACKGROUND",  (0,3), (-1,3),  colors.Color(1,0,0.435, 0.10)),
+    ]))
+    story += [Spacer(1, 6), kpi, Spacer(1, 10)]
+
+    # Tabela diária
+    df_tbl = df_diario.copy()
+    if not df_tbl.empty:
+        df_tbl["Data"] = pd.to_datetime(df_tbl["Data"]).dt.strftime("%d/%m/%Y")
+        df_tbl["Vendas_fmt"]   = df_tbl["Vendas"].apply(fmt_brl_safe)
+        df_tbl["Despesas_fmt"] = df_tbl["Despesas"].apply(fmt_brl_safe)
+        df_tbl["Lucro_fmt"]    = df_tbl["Lucro"].apply(fmt_brl_safe)
+
+        header = [["Data", "Vendas", "Despesas", "Lucro"]]
+        rows = df_tbl[["Data","Vendas_fmt","Despesas_fmt","Lucro_fmt"]].values.tolist()
+
+        tot_row = [
+            "Total",
+            fmt_brl_safe(df_tbl["Vendas"].sum()),
+            fmt_brl_safe(df_tbl["Despesas"].sum()),
+            fmt_brl_safe(df_tbl["Lucro"].sum()),
+        ]
+        data_table = header + rows + [tot_row]
+
+        lt = LongTable(data_table, colWidths=[30*mm, 42*mm, 42*mm, 42*mm], repeatRows=1)
+        lt.setStyle(TableStyle([
+            ("FONT",          (0,0), (-1,-1), "Helvetica", 9),
+            ("ALIGN",         (1,1), (-1,-2), "RIGHT"),
+            ("ALIGN",         (1,-1), (-1,-1), "RIGHT"),
+            ("BACKGROUND",    (0,0), (-1,0),  colors.Color(.2,.2,.2)),
+            ("TEXTCOLOR",     (0,0), (-1,0),  colors.whitesmoke),
+            ("ROWBACKGROUNDS",(0,1), (-1,-2), [colors.whitesmoke, colors.Color(0.97,0.97,0.97)]),
+            ("GRID",          (0,0), (-1,-1), 0.25, colors.Color(0.75,0.75,0.75)),
+            ("LINEABOVE",     (0,-1), (-1,-1), 0.5, colors.HexColor("#FF006F")),
+            ("FONT",          (0,-1), (-1,-1), "Helvetica-Bold", 9),
+        ]))
+        story += [Paragraph("Detalhamento diário", h2), lt, Spacer(1, 10)]
+    else:
+        story += [Paragraph("Não há dados diários no período selecionado.", body), Spacer(1, 6)]
+
+    # Gráficos (páginas seguintes) — mesma resolução escolhida na tela
+    resolucao, res_bar = resolucoes(df_diario, rotulo_res)
+    figs = [
+        (f"Evolução ({graficos.RESOLUCOES[resolucao][2].lower()})", fig_linha(df_diario, resolucao)),
+        (f"Comparativo ({graficos.RESOLUCOES[res_bar][2].lower()}) (Vendas x Despesas x Lucro)", fig_barras(df_diario, res_bar)),
+        ("Distribuição de pagamentos", fig_pagamentos(vendas_f)),
+        ("Top 10 produtos", fig_top(vendas_f)),
+    ]
+    figs = [(titulo, fig) for titulo, fig in figs if fig is not None]
+
+    completo = True
+    if figs:
+        story.append(PageBreak())
+        for i, (titulo, fig) in enumerate(figs):
+            imagem, ok = _fig_to_story(fig)
+            completo &= ok
+            story += [Paragraph(titulo, h2), imagem, Spacer(1, 8)]
+            if i < len(figs)-1:
+                story.append(Spacer(1, 4))
+
+    doc.build(story)
+    return buffer.getvalue(), completo
+
+# ---------------- Cache de períodos fechados ----------------
+_lock = threading.Lock()
+
+def periodo_fechado(data_fim) -> bool:
+    return pd.to_datetime(data_fim).date() < date.today()
+
+def _versao_periodo(vendas_f: pd.DataFrame, despesas_f: pd.DataFrame) -> str:
+    """Hash do conteúdo do período: muda só se alguma linha dentro dele mudar."""
+    h = hashlib.sha1()
+    for df, colunas in ((vendas_f, COLUNAS_VENDAS_PDF), (despesas_f, COLUNAS_DESPESAS_PDF)):
+        h.update(str(len(df)).encode())
+        if not df.empty:
+            # só as colunas do PDF; o hash não depende do dtype (texto/category dão o mesmo)
+            h.update(pd.util.hash_pandas_object(df[colunas], index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+def _prefixo(data_inicio, data_fim, rotulo_res) -> str:
+    res = ROTULOS_RES.get(rotulo_res) or "auto"
+    return f"{pd.to_datetime(data_inicio):%Y%m%d}_{pd.to_datetime(data_fim):%Y%m%d}_{res}_v{VERSAO_LAYOUT}_"
+
+def _arquivo(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res) -> str:
+    nome = _prefixo(data_inicio, data_fim, rotulo_res) + _versao_periodo(vendas_f, despesas_f) + ".pdf"
+    return os.path.join(PASTA_PDFS, nome)
+
+def pdf_em_cache(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res: str = "Automática") -> bytes | None:
+    """PDF já pronto do período (só períodos fechados), ou None."""
+    if not periodo_fechado(data_fim):
+        return None
+    try:
+        with open(_arquivo(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def pdf_periodo(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res: str = "Automática") -> bytes:
+    """PDF do período: do cache quando fechado e inalterado; senão gera.
+
+    Guarda no cache só PDFs de períodos fechados com todos os gráficos.
+    """
+    pronto = pdf_em_cache(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res)
+    if pronto is not None:
+        return pronto
+    pdf, completo = _gerar_pdf(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res)
+    if completo and periodo_fechado(data_fim):
+        _guardar(_arquivo(data_inicio, data_fim, vendas_f, despesas_f, rotulo_res), pdf,
+                 _prefixo(data_inicio, data_fim, rotulo_res))
+    return pdf
+
+def _guardar(path: str, pdf: bytes, prefixo: str):
+    os.makedirs(PASTA_PDFS, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="tmp_", suffix=".pdf", dir=PASTA_PDFS)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf)
+    _substituir_arquivo(tmp, path)
+    # versões antigas do mesmo período (edição tardia) saem do disco
+    for velho in glob.glob(os.path.join(PASTA_PDFS, glob.escape(prefixo) + "*.pdf")):
+        if velho != path:
+            try:
+                os.remove(velho)
+            except OSError:
+                pass
+
+# ---------------- Pré-geração em segundo plano ----------------
+# gráfico que não rasterizou (kaleido/Chrome ausente ou falha passageira): a pré-geração
+# espera ESPERA_FALHA_S (dobrando a cada nova falha, até ESPERA_MAX_S) e tenta um mês só
+ESPERA_FALHA_S = 300
+ESPERA_MAX_S = 6 * 3600
+_falhas = 0
+_proxima_tentativa = 0.0
+_ultima_atividade = 0.0
+_trabalhador = None
+_trabalhador_lock = threading.Lock()
+
+def marcar_atividade():
+    """Chamado a cada rerun do app: a pré-geração só roda com o app ocioso."""
+    global _ultima_atividade
+    _ultima_atividade = time.time()
+
+def meses_fechados(n: int = MESES_PREGERADOS, hoje: date | None = None):
+    """(início, fim) dos `n` últimos meses completos, do mais recente para o mais antigo."""
+    fim = (hoje or date.today()).replace(day=1) - timedelta(days=1)
+    for _ in range(n):
+        inicio = fim.replace(day=1)
+        yield inicio, fim
+        fim = inicio - timedelta(days=1)
+
+def pregerar_meses_fechados(n: int = MESES_PREGERADOS) -> list:
+    """Garante o PDF (resolução automática) dos últimos meses fechados com movimento.
+
+    Barato quando já está tudo pronto: só filtra e calcula o hash de cada mês.
+    Um PDF sem gráficos não vai para o cache: a passada para no primeiro mês que
+    falhar e a próxima tentativa (de um mês) espera com recuo exponencial.
+    Retorna os meses gerados agora.
+    """
+    global _falhas, _proxima_tentativa
+    gerados = []
+    with _lock:
+        if time.time() < _proxima_tentativa:
+            return gerados
+        for inicio, fim in meses_fechados(n):
+            vendas_f, despesas_f = dados_periodo(inicio, fim, COLUNAS_VENDAS_PDF, COLUNAS_DESPESAS_PDF)
+            if vendas_f.empty and despesas_f.empty:
+                continue
+            if pdf_em_cache(inicio, fim, vendas_f, despesas_f) is not None:
+                continue
+            pdf, completo = _gerar_pdf(inicio, fim, vendas_f, despesas_f, "Automática")
+            if not completo:
+                _falhas += 1
+                _proxima_tentativa = time.time() + min(ESPERA_MAX_S, ESPERA_FALHA_S * 2 ** (_falhas - 1))
+                break
+            _falhas, _proxima_tentativa = 0, 0.0
+            _guardar(_arquivo(inicio, fim, vendas_f, despesas_f, "Automática"), pdf,
+                     _prefixo(inicio, fim, "Automática"))
+            gerados.append((inicio, fim))
+    return gerados
+
+def _laco_pregeracao(intervalo_s: float, ocioso_s: float):
+    while True:
+        # confere periodicamente: depois da meia-noite do dia 1º o mês recém-fechado
+        # entra na próxima passada em que o app estiver ocioso
+        if time.time() - _ultima_atividade >= ocioso_s:
+            try:
+                pregerar_meses_fechados()
+            except Exception:
+                pass  # tenta de novo na próxima passada (o clique no botão continua gerando)
+        time.sleep(intervalo_s)
+
+def iniciar_pregeracao(intervalo_s: float = 300, ocioso_s: float = 60):
+    """Liga (uma vez por processo) a pré-geração dos meses fechados em segundo plano."""
+    global _trabalhador
+    with _trabalhador_lock:
+        if _trabalhador is None:
+            _trabalhador = threading.Thread(target=_laco_pregeracao, args=(intervalo_s, ocioso_s),
+                                            name="pregeracao-pdf", daemon=True)
+            _trabalhador.start()
+
+if __name__ == "__main__":
+    for inicio, fim in pregerar_meses_fechados():
+        print(f"✅ PDF gerado: {inicio:%m/%Y}")
+    print(f"PDFs em {PASTA_PDFS}")
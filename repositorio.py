@@ -0,0 +1,337 @@
+# repositorio.py — dados compartilhados por todas as sessões do processo
+#
+# Um único repositório por servidor guarda vendas e despesas já tipadas. Um
+# observador (watchdog) acompanha DATA_DIR: quando o CSV só cresceu (append), lê
+# apenas os bytes novos; quando foi reescrito (os.replace, edição no Excel),
+# recarrega tudo. Cada mudança incrementa `versao`, que sessões e caches usam como
+# chave. Cada acesso também confere os arquivos com um os.stat barato, então a
+# gravação feita pela própria sessão aparece na hora e um evento perdido (OneDrive,
+# pasta de rede) não deixa dados velhos.
+# Uma última linha sem quebra (arquivo salvo pelo Excel) conta como dado numa
+# carga completa; depois de um append, quando tamanho e mtime se repetem na
+# conferência seguinte — antes disso pode ser uma escrita em andamento.
+#
+# Leituras isoladas: cada mudança publica um Instantaneo imutável com as duas
+# tabelas da mesma versão. O leitor fixa o instantâneo atual sem trava (é só ler
+# uma referência) e usa só ele do começo ao fim — um relatório nunca mistura
+# vendas de uma versão com despesas de outra, nem abre os CSVs. Quem grava monta a
+# versão seguinte à parte e troca a referência de uma vez. DataFrames publicados
+# nunca são alterados (um append gera outro via concat), então uma versão antiga
+# segue íntegra enquanto algum leitor a segura e é coletada quando o último a solta.
+#
+# No modo de pouca memória (memoria.py) as tabelas não ficam residentes: o
+# instantâneo guarda só a identidade dos arquivos (inode + bytes publicados) e
+# as telas leem em blocos exatamente esse trecho. Um append continua sendo só
+# append (a marca não muda de `recargas`): as linhas são contadas e quem acompanha
+# a tabela lê em blocos apenas os bytes depois da sua marca.
+import io
+import os
+import threading
+import time
+
+import pandas as pd
+
+import memoria
+from armazenamento import (
+    DATA_DIR, ARQ_REGISTROS, ARQ_DESPESAS, COLUNAS_VENDAS, COLUNAS_DESPESAS,
+    NUMERICAS_VENDAS, NUMERICAS_DESPESAS, BLOCO_LINHAS, _Trecho, ler_periodo, ler_tabela,
+)
+
+TABELAS = {
+    "vendas":   (ARQ_REGISTROS, COLUNAS_VENDAS, NUMERICAS_VENDAS),
+    "despesas": (ARQ_DESPESAS, COLUNAS_DESPESAS, NUMERICAS_DESPESAS),
+}
+_CONFERE = 64  # bytes antes do fim já lido usados para confirmar que foi só append
+
+def _fim_ultima_linha(f, tamanho: int, passo: int = 64 * 1024) -> int:
+    """Bytes até a última quebra de linha do arquivo aberto `f`."""
+    fim = tamanho
+    while fim > 0:
+        ini = max(0, fim - passo)
+        f.seek(ini)
+        pos = f.read(fim - ini).rfind(b"\n")
+        if pos >= 0:
+            return ini + pos + 1
+        fim = ini
+    return 0
+
+def _contar_linhas(fonte, com_cabecalho: bool = True) -> int:
+    """Linhas de dados de um CSV (mesmo parser das leituras, em blocos de uma coluna)."""
+    try:
+        leitor = pd.read_csv(fonte, encoding="utf-8", usecols=[0], dtype="string", chunksize=BLOCO_LINHAS,
+                             header=0 if com_cabecalho else None)
+    except pd.errors.EmptyDataError:
+        return 0  # só a quebra que fecha a linha final já contada
+    return sum(len(bloco) for bloco in leitor)
+
+class _Tabela:
+    def __init__(self, path, colunas, numericas):
+        self.path, self.colunas, self.numericas = path, colunas, numericas
+        self.df = pd.DataFrame(columns=colunas)
+        self.offset = 0        # bytes já ingeridos
+        self.parcial = 0       # bytes da última linha (sem quebra) já ingeridos como dados
+        self.tamanho = 0       # tamanho do arquivo na última conferência
+        self.ino = None
+        self.mtime_ns = None
+        self.cauda = b""       # últimos bytes antes de `offset`
+        self.recargas = 0      # muda quando o arquivo é relido inteiro (não foi só append)
+        self.linhas = 0        # linhas de dados até `offset` (= len(df) quando residente)
+
+    def _vazia(self):
+        self.df, self.cauda = pd.DataFrame(columns=self.colunas), b""
+        self.offset, self.parcial, self.tamanho, self.ino, self.mtime_ns = 0, 0, 0, None, None
+        self.linhas = 0
+
+    def _so_estado(self):
+        """Modo de pouca memória: guarda só a identidade do arquivo e conta as linhas, sem os dados."""
+        with open(self.path, "rb") as f:
+            st_ = os.fstat(f.fileno())
+            # linha final sem quebra fica de fora até a próxima conferência (ver _promover)
+            offset = _fim_ultima_linha(f, st_.st_size)
+            f.seek(0)
+            self.linhas = _contar_linhas(io.BufferedReader(_Trecho(f, offset))) if offset else 0
+            f.seek(max(0, offset - _CONFERE))
+            self.cauda = f.read(offset - max(0, offset - _CONFERE))
+        self.df, self.parcial, self.offset = pd.DataFrame(columns=self.colunas), 0, offset
+        self.tamanho, self.ino, self.mtime_ns = st_.st_size, st_.st_ino, st_.st_mtime_ns
+
+    def _carregar_tudo(self):
+        self.recargas += 1
+        if memoria.pouca_memoria():
+            try:
+                self._so_estado()
+            except FileNotFoundError:
+                self._vazia()
+            return
+        try:
+            with open(self.path, "rb") as f:
+                st_ = os.fstat(f.fileno())
+                dados = f.read()
+        except FileNotFoundError:
+            self._vazia()
+            return
+        # carga completa: a última linha conta mesmo sem quebra (arquivo salvo pelo Excel)
+        self.df = ler_tabela(io.BytesIO(dados), self.colunas, self.numericas) if dados else pd.DataFrame(columns=self.colunas)
+        self.offset, self.tamanho, self.ino, self.mtime_ns = len(dados), st_.st_size, st_.st_ino, st_.st_mtime_ns
+        self.linhas = len(self.df)
+        self.parcial = len(dados) - (dados.rfind(b"\n") + 1)
+        self.cauda = dados[-_CONFERE:]
+
+    def _ler_acrescimo(self, st_) -> bool:
+        """Ingere só o que foi acrescentado. False se o arquivo foi reescrito."""
+        if st_.st_ino != self.ino or st_.st_size < self.offset or self.offset == 0:
+            return False
+        with open(self.path, "rb") as f:
+            ini = max(0, self.offset - len(self.cauda))
+            f.seek(ini)
+            dados = f.read()
+        if dados[:self.offset - ini] != self.cauda:
+            return False
+        novo = dados[self.offset - ini:]
+        if self.parcial and not novo.startswith((b"\n", b"\r\n")):
+            return False  # a linha sem quebra já ingerida foi continuada
+        # a linha final sem quebra pode ser uma escrita em andamento: espera a próxima conferência
+        fim = novo.rfind(b"\n") + 1
+        if fim:
+            self._ingerir(novo[:fim])
+            self.parcial = 0
+        self.tamanho, self.mtime_ns = st_.st_size, st_.st_mtime_ns
+        return True
+
+    def _ingerir(self, novo: bytes):
+        if memoria.pouca_memoria():
+            self.linhas += _contar_linhas(io.BytesIO(novo), com_cabecalho=False)  # sem tabela residente
+        else:
+            linhas = ler_tabela(io.BytesIO(novo), self.colunas, self.numericas, com_cabecalho=False)
+            self.df = pd.concat([self.df, linhas], ignore_index=True)  # novo objeto: versões antigas intactas
+            self.linhas = len(self.df)
+        self.offset += len(novo)
+        self.cauda = (self.cauda + novo)[-_CONFERE:]
+
+    def _promover(self) -> bool:
+        """Linha final sem quebra com tamanho e mtime iguais em duas conferências: é dado."""
+        self.parcial = self.tamanho - self.offset  # `offset` estava no fim da última linha completa
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            self._ingerir(f.read(self.parcial))
+        return True
+
+    def atualizar(self) -> bool:
+        """Sincroniza com o disco. True se os dados mudaram."""
+        try:
+            st_ = os.stat(self.path)
+        except FileNotFoundError:
+            if self.ino is None and self.df.empty:
+                return False
+            self._carregar_tudo()
+            return True
+        if st_.st_ino == self.ino and st_.st_size == self.tamanho and st_.st_mtime_ns == self.mtime_ns:
+            return self.offset < self.tamanho and self._promover()
+        antes = self.linhas, self.offset
+        if st_.st_size > self.offset and self._ler_acrescimo(st_):
+            return (self.linhas, self.offset) != antes
+        self._carregar_tudo()
+        return True
+
+class Instantaneo:
+    """Uma versão de vendas + despesas, igual para todos que a fixaram. Não altere os DataFrames."""
+
+    __slots__ = ("versao", "versao_str", "marcas", "arquivos", "_tabelas", "_validas")
+
+    def __init__(self, versao: int, versao_str: str, tabelas: dict, marcas: dict, arquivos: dict):
+        self.versao, self.versao_str = versao, versao_str
+        self._tabelas = tabelas
+        self._validas = {}
+        # marca = (recargas, linhas, bytes): até onde um leitor já processou a tabela
+        self.marcas = marcas
+        # identidade de cada arquivo: (inode, bytes publicados, tamanho, mtime)
+        self.arquivos = arquivos
+
+    def tabela(self, nome: str, so_datas_validas: bool = False) -> pd.DataFrame:
+        df = self._tabelas[nome]
+        if not so_datas_validas:
+            return df
+        validas = self._validas.get(nome)
+        if validas is None:
+            # idempotente: duas threads no mesmo instantâneo chegam ao mesmo resultado
+            validas = self._validas[nome] = df.dropna(subset=["Data"])
+        return validas
+
+    def trecho(self, nome: str) -> tuple:
+        """(inode, bytes) do CSV nesta versão, para ler em blocos sem passar do que foi publicado."""
+        ino, offset, _, _ = self.arquivos[nome]
+        return ino, offset
+
+    def novas_linhas(self, nome: str, marca: tuple) -> pd.DataFrame | None:
+        """Linhas acrescentadas entre `marca` e esta versão.
+
+        None quando a tabela foi relida inteira desde a marca (exclusão, edição):
+        o leitor precisa recomeçar do zero. Sem a tabela residente (pouca memória)
+        lê em blocos só os bytes depois da marca; o índice é a posição no CSV.
+        """
+        recargas, linhas, offset = self.marcas[nome]
+        if marca[0] != recargas or marca[1] > linhas:
+            return None
+        df = self._tabelas[nome]
+        if len(df) == linhas:
+            return df.iloc[marca[1]:]
+        path, colunas, numericas = TABELAS[nome]
+        return ler_periodo(path, colunas, numericas, trecho=self.trecho(nome), desde=(marca[2], marca[1]))
+
+class Repositorio:
+    def __init__(self):
+        self._lock = threading.RLock()  # só para quem publica: leitores não travam
+        self._tabelas = {nome: _Tabela(*cfg) for nome, cfg in TABELAS.items()}
+        self._boot = f"{time.time_ns():x}"  # distingue versões entre reinícios do processo
+        self.versao = 0
+        self.observador = None
+        for t in self._tabelas.values():
+            t._carregar_tudo()
+        self._publicar()
+
+    @property
+    def versao_str(self) -> str:
+        return f"{self._boot}.{self.versao}"
+
+    def _publicar(self):
+        # monta a versão inteira antes; a troca da referência é atômica para quem lê
+        self._atual = Instantaneo(
+            self.versao, self.versao_str,
+            {nome: t.df for nome, t in self._tabelas.items()},
+            {nome: (t.recargas, t.linhas, t.offset) for nome, t in self._tabelas.items()},
+            {nome: (t.ino, t.offset, t.tamanho, t.mtime_ns) for nome, t in self._tabelas.items()},
+        )
+
+    def atualizar(self) -> int:
+        """Confere os arquivos e publica uma nova versão se algo mudou."""
+        with self._lock:
+            mudou = False
+            for t in self._tabelas.values():
+                mudou = t.atualizar() or mudou
+            if mudou:
+                self.versao += 1
+                self._publicar()
+            return self.versao
+
+    def _desatualizado(self, inst: Instantaneo) -> bool:
+        """Algum arquivo mudou depois de `inst`? (os.stat, sem trava)"""
+        for nome, t in self._tabelas.items():
+            ino, offset, tamanho, mtime_ns = inst.arquivos[nome]
+            if offset < tamanho:
+                return True  # linha final sem quebra ainda pendente (ver _Tabela._promover)
+            try:
+                st_ = os.stat(t.path)
+            except FileNotFoundError:
+                if ino is not None:
+                    return True
+                continue
+            if (st_.st_ino, st_.st_size, st_.st_mtime_ns) != (ino, tamanho, mtime_ns):
+                return True
+        return False
+
+    def fixar(self) -> Instantaneo:
+        """Versão atual das duas tabelas, sem trava.
+
+        Se os arquivos mudaram e ninguém publicou ainda (evento do watchdog
+        perdido, gravação de outro processo), publica antes de devolver.
+        """
+        inst = self._atual
+        for _ in range(2):  # 2ª conferência: linha final sem quebra que não mudou vira dado
+            if not self._desatualizado(inst):
+                break
+            self.atualizar()
+            inst = self._atual
+        return inst
+
+    def descartar(self):
+        """Solta os DataFrames residentes (ao entrar no modo de pouca memória)."""
+        with self._lock:
+            for t in self._tabelas.values():
+                t.df = pd.DataFrame(columns=t.colunas)
+            self._publicar()
+
+    # ---------------- watchdog ----------------
+    def observar(self):
+        """Liga o observador de DATA_DIR (se o watchdog estiver disponível)."""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+        alvos = {os.path.normcase(os.path.abspath(t.path)) for t in self._tabelas.values()}
+        repo = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type not in ("modified", "created", "moved", "deleted", "closed"):
+                    return  # "opened"/"closed_no_write": leituras, inclusive as nossas
+                caminhos = {getattr(event, "src_path", ""), getattr(event, "dest_path", "")}
+                if any(os.path.normcase(os.path.abspath(c)) in alvos for c in caminhos if c):
+                    repo.atualizar()
+
+        obs = Observer()
+        obs.daemon = True
+        obs.schedule(_Handler(), DATA_DIR, recursive=False)
+        obs.start()
+        self.observador = obs
+        self.atualizar()  # cobre mudanças entre a carga inicial e o start
+
+_instancia = None
+_instancia_lock = threading.Lock()
+
+def obter() -> Repositorio:
+    """Repositório único do processo (criado e observado no primeiro uso)."""
+    global _instancia
+    if _instancia is None:
+        with _instancia_lock:
+            if _instancia is None:
+                repo = Repositorio()
+                repo.observar()
+                memoria.ao_liberar(repo.descartar)
+                _instancia = repo
+    return _instancia
+
+def publicar():
+    """Para quem grava: publica a nova versão na hora (se o repositório já existe)."""
+    if _instancia is not None:
+        _instancia.atualizar()
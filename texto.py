@@ -0,0 +1,10 @@
+# texto.py — normalização de texto digitado à mão
+#
+# Usada para casar cabeçalhos e formas de pagamento dos extratos (ingestao.py) e
+# para agrupar grafias do mesmo produto (busca.py).
+import unicodedata
+
+def normalizar(txt) -> str:
+    """Sem acento, minúsculo e sem espaços nas pontas."""
+    txt = unicodedata.normalize("NFKD", str(txt))
+    return "".join(c for c in txt if not unicodedata.combining(c)).casefold().strip()